@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import math
+import os
+import struct
+
+
+class BloomFilter(object):
+    """
+    Fixed-size probabilistic set. Membership tests never give false
+    negatives and give false positives at roughly error_rate once capacity
+    keys have been added.
+
+    attr:
+        - num_bits (int): size of the bit array.
+        - num_hashes (int): bits set per key.
+        - count (int): number of keys added so far.
+    """
+
+    header = struct.Struct('<QQQ')
+
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.num_bits, self.num_hashes = self.size(capacity, error_rate)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    @staticmethod
+    def size(capacity, error_rate):
+        """
+        returns:
+            - tuple(int): num_bits and num_hashes of a filter holding
+                capacity keys at error_rate.
+        """
+
+        num_bits = max(
+            8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        )
+        num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+        return num_bits, num_hashes
+
+    def positions(self, key):
+        # double hashing: k positions derived from two 64 bit halves of
+        # a single digest.
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """
+        Add key to the filter.
+
+        returns:
+            - True if the key was (probably) already present.
+        """
+
+        present = True
+        for pos in self.positions(key):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                present = False
+                self.bits[pos >> 3] |= mask
+
+        if not present:
+            self.count += 1
+        return present
+
+    def __contains__(self, key):
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(key)
+        )
+
+    def __len__(self):
+        return self.count
+
+    def save(self, path):
+        """
+        Write the filter to path. The file is replaced atomically so an
+        interrupted crawl never leaves a truncated filter behind.
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self.header.pack(self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            num_bits, num_hashes, count = cls.header.unpack(
+                f.read(cls.header.size))
+            bits = bytearray(f.read())
+
+        bloom = cls.__new__(cls)
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bits
+        bloom.count = count
+        return bloom
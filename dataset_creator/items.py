@@ -10,6 +10,7 @@ from scrapy.item import Item, Field
 
 class QuestionItem(Item):
     # question = Field()
+    id = Field()
     votes = Field()
     answers = Field()
     views = Field()
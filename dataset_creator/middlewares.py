@@ -5,8 +5,13 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+
 from scrapy import signals
 
+from dataset_creator.bloom import BloomFilter
+from dataset_creator.items import QuestionItem
+
 
 class DatasetCreatorSpiderMiddleware(object):
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +106,86 @@ class DatasetCreatorDownloaderMiddleware(object):
 
     def spider_opened(self, spider):
         spider.logger.info('Spider opened: %s' % spider.name)
+
+
+class SeenQuestionsMiddleware(object):
+    # Drops questions that were already scraped, e.g. when the "newest"
+    # listing shifts between two pages, before they reach the item
+    # pipelines. An id only enters the bloom filter once its item went
+    # through every pipeline (item_scraped), so a crash or a failed insert
+    # never marks a question as seen; until then it is kept in an in flight
+    # set. The filter is persisted to SEEN_FILTER_PATH on close and every
+    # SEEN_FILTER_CHECKPOINT new ids, so a crash loses at most that many,
+    # and reloaded on the next run.
+
+    def __init__(self, stats, path, capacity, error_rate, checkpoint=10000):
+        self.stats = stats
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.checkpoint = checkpoint
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(
+            crawler.stats,
+            crawler.settings.get('SEEN_FILTER_PATH'),
+            crawler.settings.getint('SEEN_FILTER_CAPACITY', 25000000),
+            crawler.settings.getfloat('SEEN_FILTER_ERROR_RATE', 0.001),
+            crawler.settings.getint('SEEN_FILTER_CHECKPOINT', 10000),
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(s.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(s.item_finished, signal=signals.item_dropped)
+        crawler.signals.connect(s.item_finished, signal=signals.item_error)
+        return s
+
+    def process_spider_output(self, response, result, spider):
+        for i in result:
+            if isinstance(i, QuestionItem) and i.get('id') is not None:
+                if i['id'] in self.in_flight or i['id'] in self.seen:
+                    self.stats.inc_value('seen_filter/skipped')
+                    continue
+                self.in_flight.add(i['id'])
+            yield i
+
+    def item_scraped(self, item, spider):
+        if not isinstance(item, QuestionItem) or item.get('id') is None:
+            return
+        self.in_flight.discard(item['id'])
+        if not self.seen.add(item['id']):
+            self.unsaved += 1
+            if self.checkpoint and self.unsaved >= self.checkpoint:
+                self.save()
+
+    def item_finished(self, item, spider):
+        # dropped or failed, the question may be scraped again.
+        if isinstance(item, QuestionItem):
+            self.in_flight.discard(item.get('id'))
+
+    def spider_opened(self, spider):
+        if self.path and os.path.exists(self.path):
+            self.seen = BloomFilter.load(self.path)
+            spider.logger.info(
+                'Loaded %d seen questions from %s' % (len(self.seen), self.path))
+            size = BloomFilter.size(self.capacity, self.error_rate)
+            if size != (self.seen.num_bits, self.seen.num_hashes):
+                # rebuilding would forget every id, so keep the saved one.
+                spider.logger.warning(
+                    'Seen filter %s was built for another '
+                    'SEEN_FILTER_CAPACITY or SEEN_FILTER_ERROR_RATE, delete it '
+                    'to apply the new settings' % self.path)
+        else:
+            self.seen = BloomFilter(self.capacity, self.error_rate)
+        self.in_flight = set()
+        self.unsaved = 0
+
+    def spider_closed(self, spider):
+        self.stats.set_value('seen_filter/size', len(self.seen))
+        self.save()
+
+    def save(self):
+        if self.path:
+            self.seen.save(self.path)
+        self.unsaved = 0
@@ -8,31 +8,207 @@
 
 import pymongo
 import logging
+import itertools
+from twisted.internet import defer, reactor, threads
+from twisted.python.threadpool import ThreadPool
+
+
+def start_threadpool(name, maxthreads):
+    # scrapy skips close_spider on a forced shutdown or when a later
+    # pipeline fails to open, and the non daemon threads of a pool that is
+    # never stopped keep the process alive. Like the reactor's own pool,
+    # stop it when the reactor shuts down as well.
+    threadpool = ThreadPool(minthreads=1, maxthreads=maxthreads, name=name)
+    threadpool.start()
+    reactor.addSystemEventTrigger(
+        'during', 'shutdown', stop_threadpool, threadpool)
+    return threadpool
+
+
+def stop_threadpool(threadpool):
+    # called by close_spider and by the shutdown trigger, whichever runs
+    # first does the work.
+    if threadpool.started:
+        threadpool.stop()
 
 
 class MongoPipeline(object):
 
     collection_name = 'stackoverflowdataset'
 
-    def __init__(self, mongo_uri, mongo_db):
+    def __init__(self, mongo_uri, mongo_db, write_threads=4, max_pending_writes=64):
         self.mongo_uri = mongo_uri
         self.mongo_db = mongo_db
+        self.write_threads = write_threads
+        self.max_pending_writes = max_pending_writes
 
     @classmethod
     def from_crawler(cls, crawler):
         return cls(
             mongo_uri=crawler.settings.get('MONGO_URI'),
-            mongo_db=crawler.settings.get('MONGO_DATABASE')
+            mongo_db=crawler.settings.get('MONGO_DATABASE'),
+            write_threads=crawler.settings.getint('MONGO_WRITE_THREADS', 4),
+            max_pending_writes=crawler.settings.getint(
+                'MONGO_MAX_PENDING_WRITES', 64),
         )
 
     def open_spider(self, spider):
         self.client = pymongo.MongoClient(self.mongo_uri)
         self.db = self.client[self.mongo_db]
 
+        # writes run off the reactor thread so a slow insert never stalls
+        # downloads and parsing.
+        self.threadpool = start_threadpool('mongo-writes', self.write_threads)
+
+        # at most max_pending_writes inserts are queued or running. Further
+        # items wait on the semaphore, which keeps the scraper slot busy and
+        # makes scrapy stop scheduling new responses until writes catch up.
+        self.pending = defer.DeferredSemaphore(self.max_pending_writes)
+        self.writes = set()
+
+    @defer.inlineCallbacks
     def close_spider(self, spider):
+        # drain every queued and running write before tearing down.
+        yield defer.DeferredList(list(self.writes))
+        stop_threadpool(self.threadpool)
         self.client.close()
 
     def process_item(self, item, spider):
-        self.db[self.collection_name].insert_one(dict(item))
+        d = self.pending.run(
+            threads.deferToThreadPool, reactor, self.threadpool,
+            self.insert, dict(item)
+        )
+        self.writes.add(d)
+        d.addBoth(self._write_done, d)
+        d.addCallback(lambda _: item)
+        return d
+
+    def insert(self, doc):
+        self.db[self.collection_name].insert_one(doc)
         logging.debug("Post added to MongoDB")
-        return item
+
+    def _write_done(self, result, d):
+        self.writes.discard(d)
+        return result
+
+
+class TagStatsPipeline(object):
+    """
+    Keep per-tag and per-pair totals up to date while crawling so the
+    plotter does not need to rescan every question.
+
+    Counters are accumulated in memory and flushed as one batch of $inc
+    upserts every batch_size items and when the spider closes. The number
+    of questions counted so far is kept in tag_stats_meta so the plotter
+    can tell whether the counters cover the whole collection.
+    """
+
+    stats_collection = 'tag_stats'
+    pairs_collection = 'tag_pairs'
+    meta_collection = 'tag_stats_meta'
+
+    def __init__(self, mongo_uri, mongo_db, batch_size=500):
+        self.mongo_uri = mongo_uri
+        self.mongo_db = mongo_db
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            mongo_uri=crawler.settings.get('MONGO_URI'),
+            mongo_db=crawler.settings.get('MONGO_DATABASE'),
+            batch_size=crawler.settings.getint('TAG_STATS_BATCH_SIZE', 500),
+        )
+
+    def open_spider(self, spider):
+        # a single writer of its own, so batches neither compete with
+        # MongoPipeline nor with the reactor pool scrapy uses for dns. It is
+        # started first so the shutdown trigger covers a failed open too.
+        self.threadpool = start_threadpool('tag-stats-writes', 1)
+        self.reset_batch()
+
+        self.client = pymongo.MongoClient(self.mongo_uri)
+        self.db = self.client[self.mongo_db]
+        self.db[self.pairs_collection].create_index(
+            [('source', pymongo.ASCENDING), ('target', pymongo.ASCENDING)],
+            unique=True,
+        )
+
+    @defer.inlineCallbacks
+    def close_spider(self, spider):
+        yield self.flush()
+        stop_threadpool(self.threadpool)
+        self.client.close()
+
+    def process_item(self, item, spider):
+        tags = item['tags']
+
+        for tag in tags:
+            stats = self.tags.setdefault(
+                tag, {'views': 0, 'answers': 0, 'votes': 0, 'weight': 0})
+            stats['views'] += item['views']
+            stats['answers'] += item['answers']
+            stats['votes'] += item['votes']
+            stats['weight'] += 1
+
+        for edge in set(itertools.combinations(tags, 2)):
+            # same convention as Graph.add_document in the plotter: a pair
+            # is always stored with its tags in sorted order.
+            pair = tuple(sorted(edge))
+            self.pairs[pair] = self.pairs.get(pair, 0) + 1
+
+        self.items += 1
+        if self.items < self.batch_size:
+            return item
+
+        d = self.flush()
+        d.addCallback(lambda _: item)
+        return d
+
+    def reset_batch(self):
+        self.tags = {}
+        self.pairs = {}
+        self.items = 0
+
+    def flush(self):
+        """
+        Hand the current batch to a worker thread and start a new one.
+
+        returns:
+            - Deferred fired once the batch has been written.
+        """
+
+        tags, pairs, items = self.tags, self.pairs, self.items
+        self.reset_batch()
+        if not items:
+            return defer.succeed(None)
+        return threads.deferToThreadPool(
+            reactor, self.threadpool, self.write_batch, tags, pairs, items
+        )
+
+    def write_batch(self, tags, pairs, items):
+        if tags:
+            self.db[self.stats_collection].bulk_write(
+                [
+                    pymongo.UpdateOne({'_id': tag}, {'$inc': stats}, upsert=True)
+                    for tag, stats in tags.items()
+                ],
+                ordered=False,
+            )
+
+        if pairs:
+            self.db[self.pairs_collection].bulk_write(
+                [
+                    pymongo.UpdateOne(
+                        {'source': n1, 'target': n2},
+                        {'$inc': {'weight': weight}},
+                        upsert=True,
+                    )
+                    for (n1, n2), weight in pairs.items()
+                ],
+                ordered=False,
+            )
+
+        self.db[self.meta_collection].update_one(
+            {'_id': 'questions'}, {'$inc': {'count': items}}, upsert=True)
+        logging.debug("Flushed stats of %d tags to MongoDB", len(tags))
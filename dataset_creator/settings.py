@@ -47,9 +47,21 @@ RANDOMIZE_DOWNLOAD_DELAY = True
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-# SPIDER_MIDDLEWARES = {
-#    'dataset_creator.middlewares.DatasetCreatorSpiderMiddleware': 543,
-# }
+SPIDER_MIDDLEWARES = {
+    "dataset_creator.middlewares.SeenQuestionsMiddleware": 543,
+}
+
+# Questions already scraped are skipped using a bloom filter sized for
+# SEEN_FILTER_CAPACITY ids at SEEN_FILTER_ERROR_RATE false positives. Only
+# ids whose item was written are added. Changing the size has no effect
+# until the saved filter is deleted, a warning is logged meanwhile. It is
+# saved to SEEN_FILTER_PATH every SEEN_FILTER_CHECKPOINT new ids and when the
+# spider closes, and reloaded on start. The path lives on the mounted volume
+# so the filter survives removing the container.
+SEEN_FILTER_PATH = "/app/data/seen_questions.bloom"
+SEEN_FILTER_CAPACITY = 25000000
+SEEN_FILTER_ERROR_RATE = 0.001
+SEEN_FILTER_CHECKPOINT = 10000
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -65,11 +77,23 @@ RANDOMIZE_DOWNLOAD_DELAY = True
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-ITEM_PIPELINES = {"dataset_creator.pipelines.MongoPipeline": 300}
+ITEM_PIPELINES = {
+    "dataset_creator.pipelines.MongoPipeline": 300,
+    "dataset_creator.pipelines.TagStatsPipeline": 400,
+}
 
 MONGO_URI = "mongodb://mongo_app:27017"
 MONGO_DATABASE = "stackoverflowdataset"
 
+# Inserts run in a bounded thread pool. When MONGO_MAX_PENDING_WRITES items
+# are waiting to be written the crawl slows down instead of buffering.
+MONGO_WRITE_THREADS = 4
+MONGO_MAX_PENDING_WRITES = 64
+
+# Number of items aggregated before the tag_stats and tag_pairs collections
+# are updated.
+TAG_STATS_BATCH_SIZE = 500
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 # AUTOTHROTTLE_ENABLED = True
@@ -14,6 +14,9 @@ class SodsSpider(CrawlSpider):
         for question in response.css("div.question-summary"):
             item = QuestionItem()
 
+            # summaries are rendered as <div id="question-summary-12345">
+            item["id"] = int(
+                re.findall(r"\d+", question.css("::attr(id)").get())[0])
             item["votes"] = int(question.css("div.votes strong::text").get())
             item["answers"] = int(question.css(
                 "div.status strong::text").get())
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from dataset_creator.bloom import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_add_contains(self):
+        bloom = BloomFilter(1000, 0.01)
+        self.assertNotIn(42, bloom)
+        self.assertFalse(bloom.add(42))
+        self.assertIn(42, bloom)
+        self.assertTrue(bloom.add(42))
+        self.assertEqual(len(bloom), 1)
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000, 0.01)
+        for i in range(5000):
+            bloom.add(i)
+        self.assertTrue(all(i in bloom for i in range(5000)))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(10000, 0.01)
+        for i in range(10000):
+            bloom.add(i)
+        false_positives = sum(i in bloom for i in range(10000, 60000))
+        self.assertLess(false_positives / 50000, 0.02)
+
+    def test_save_load(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(100):
+            bloom.add(i)
+
+        path = os.path.join(tempfile.mkdtemp(), "nested", "seen.bloom")
+        bloom.save(path)
+        loaded = BloomFilter.load(path)
+
+        self.assertEqual(loaded.num_bits, bloom.num_bits)
+        self.assertEqual(loaded.num_hashes, bloom.num_hashes)
+        self.assertEqual(len(loaded), 100)
+        self.assertEqual(loaded.bits, bloom.bits)
+        self.assertTrue(all(i in loaded for i in range(100)))
+        self.assertFalse(os.path.exists(path + ".tmp"))
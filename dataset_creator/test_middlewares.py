@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from scrapy import Spider
+from scrapy.statscollectors import MemoryStatsCollector
+from scrapy.utils.test import get_crawler
+from dataset_creator.items import QuestionItem
+from dataset_creator.middlewares import SeenQuestionsMiddleware
+
+
+def question(id):
+    return QuestionItem(id=id, votes=0, answers=0, views=0, tags=[])
+
+
+class TestSeenQuestionsMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "seen.bloom")
+        self.crawler = get_crawler(Spider)
+        self.spider = Spider("test")
+        self.stats = MemoryStatsCollector(self.crawler)
+
+    def middleware(self, checkpoint=10000, capacity=1000):
+        mw = SeenQuestionsMiddleware(
+            self.stats, self.path, capacity, 0.001, checkpoint)
+        mw.spider_opened(self.spider)
+        return mw
+
+    def output(self, mw, result):
+        return list(mw.process_spider_output(None, result, self.spider))
+
+    def scrape(self, mw, result):
+        # output, then every item written by the pipelines.
+        out = self.output(mw, result)
+        for i in out:
+            mw.item_scraped(i, self.spider)
+        return out
+
+    def test_drops_duplicates(self):
+        mw = self.middleware()
+        out = self.output(mw, [question(1), question(2), question(1), "req"])
+        self.assertEqual([i if isinstance(i, str) else i["id"] for i in out],
+                         [1, 2, "req"])
+        self.assertEqual(
+            self.stats.get_value("seen_filter/skipped"), 1)
+
+    def test_persists_across_runs(self):
+        mw = self.middleware()
+        self.scrape(mw, [question(1), question(2)])
+        mw.spider_closed(self.spider)
+
+        out = self.output(self.middleware(), [question(2), question(3)])
+        self.assertEqual([i["id"] for i in out], [3])
+
+    def test_checkpoint(self):
+        mw = self.middleware(checkpoint=2)
+        self.scrape(mw, [question(1)])
+        self.assertFalse(os.path.exists(self.path))
+        self.scrape(mw, [question(2)])
+        self.assertTrue(os.path.exists(self.path))
+
+        # a crash after the checkpoint keeps the ids seen so far.
+        out = self.output(self.middleware(), [question(1), question(2)])
+        self.assertEqual(out, [])
+
+    def test_only_written_items_are_seen(self):
+        mw = self.middleware(checkpoint=1)
+        self.output(mw, [question(1), question(2)])
+        mw.item_scraped(question(1), self.spider)
+        self.assertEqual(self.output(mw, [question(2)]), [])
+
+        # 2 was never written, so a crash does not mark it as seen.
+        out = self.output(self.middleware(), [question(1), question(2)])
+        self.assertEqual([i["id"] for i in out], [2])
+
+    def test_failed_items_are_released(self):
+        mw = self.middleware()
+        self.output(mw, [question(1)])
+        mw.item_finished(question(1), self.spider)
+        self.assertEqual(len(self.output(mw, [question(1)])), 1)
+
+    def test_warns_on_other_size(self):
+        mw = self.middleware()
+        mw.spider_closed(self.spider)
+        with self.assertLogs(self.spider.logger.logger, "WARNING"):
+            self.middleware(capacity=5000)
@@ -0,0 +1,40 @@
+import unittest
+from unittest import mock
+from dataset_creator import pipelines
+from dataset_creator.pipelines import (
+    TagStatsPipeline, start_threadpool, stop_threadpool)
+
+
+class TestThreadPool(unittest.TestCase):
+    def test_stopped_on_shutdown(self):
+        with mock.patch.object(pipelines, 'reactor') as reactor:
+            threadpool = start_threadpool('test', 2)
+        reactor.addSystemEventTrigger.assert_called_once_with(
+            'during', 'shutdown', stop_threadpool, threadpool)
+        stop_threadpool(threadpool)
+        self.assertFalse(threadpool.started)
+        self.assertFalse(any(t.is_alive() for t in threadpool.threads))
+
+    def test_stop_twice(self):
+        with mock.patch.object(pipelines, 'reactor'):
+            threadpool = start_threadpool('test', 1)
+        stop_threadpool(threadpool)
+        stop_threadpool(threadpool)
+        self.assertFalse(threadpool.started)
+
+
+class TestTagStatsPipeline(unittest.TestCase):
+    def test_failed_open_stops_on_shutdown(self):
+        pipeline = TagStatsPipeline('mongodb://localhost:1/', 'test')
+        client = mock.MagicMock()
+        client.__getitem__.return_value.__getitem__.return_value \
+            .create_index.side_effect = RuntimeError('mongo is down')
+
+        with mock.patch.object(pipelines, 'reactor') as reactor, \
+                mock.patch('pymongo.MongoClient', return_value=client):
+            with self.assertRaises(RuntimeError):
+                pipeline.open_spider(None)
+
+        reactor.addSystemEventTrigger.assert_called_once_with(
+            'during', 'shutdown', stop_threadpool, pipeline.threadpool)
+        stop_threadpool(pipeline.threadpool)
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from collections import defaultdict
+import heapq
+
+
+def min_weight_edges(edges, min_weight):
+    """
+    Keep only edges used together at least min_weight times.
+
+    params:
+        - edges (Dict[Tuple(str, str), int]): weight per edge.
+        - min_weight (int): smallest weight kept.
+
+    returns:
+        - Dict[Tuple(str, str), int]: the kept edges.
+    """
+
+    return {edge: weight for edge, weight in edges.items() if weight >= min_weight}
+
+
+def disparity_edges(edges, alpha):
+    """
+    Disparity filter backbone (Serrano, Boguna and Vespignani, 2009).
+    For a node with strength s and degree k, an edge of weight w is
+    significant if (1 - w / s) ** (k - 1) < alpha, i.e. it carries more of
+    the node's weight than a uniform random split would. An edge is kept if
+    it is significant for either of its tags. Edges of tags with a single
+    edge are always kept.
+
+    params:
+        - edges (Dict[Tuple(str, str), int]): weight per edge.
+        - alpha (float): significance level, smaller keeps fewer edges.
+
+    returns:
+        - Dict[Tuple(str, str), int]: the kept edges.
+    """
+
+    strength = defaultdict(int)
+    degree = defaultdict(int)
+    for (n1, n2), weight in edges.items():
+        strength[n1] += weight
+        strength[n2] += weight
+        degree[n1] += 1
+        degree[n2] += 1
+
+    def significant(node, weight):
+        if degree[node] < 2:
+            return True
+        return (1 - weight / strength[node]) ** (degree[node] - 1) < alpha
+
+    return {
+        (n1, n2): weight
+        for (n1, n2), weight in edges.items()
+        if significant(n1, weight) or significant(n2, weight)
+    }
+
+
+def top_k_edges(edges, k):
+    """
+    Keep, for every tag, its k strongest edges. An edge survives if it is
+    among the top k of either of its tags.
+
+    params:
+        - edges (Dict[Tuple(str, str), int]): weight per edge.
+        - k (int): number of edges kept per tag.
+
+    returns:
+        - Dict[Tuple(str, str), int]: the kept edges.
+    """
+
+    incident = defaultdict(list)
+    for edge, weight in edges.items():
+        incident[edge[0]].append((weight, edge))
+        incident[edge[1]].append((weight, edge))
+
+    kept = set()
+    for node_edges in incident.values():
+        kept.update(edge for _, edge in heapq.nlargest(k, node_edges))
+
+    return {edge: weight for edge, weight in edges.items() if edge in kept}
+
+
+@dataclass
+class EdgeFilter:
+    """
+    EdgeFilter removes weak edges from an already trimmed graph so that
+    the layout and the html output do not grow with the square of the
+    number of tags. Filters left as None are skipped, the others are
+    applied in order: min_weight, alpha, top_k.
+
+    attr:
+        - min_weight (int): drop edges used together fewer times.
+        - alpha (float): significance level of the disparity filter.
+        - top_k (int): strongest edges kept per tag.
+    """
+
+    min_weight: int = None
+    alpha: float = None
+    top_k: int = None
+
+    def apply(self, graph):
+        """
+        Replace the edges of graph by the filtered ones. Nodes are kept even
+        if they lose all their edges.
+
+        params:
+            - graph (Graph): trimmed graph.
+
+        returns:
+            - the same graph with fewer edges.
+        """
+
+        edges = graph.edges
+        if self.min_weight is not None:
+            edges = min_weight_edges(edges, self.min_weight)
+        if self.alpha is not None:
+            edges = disparity_edges(edges, self.alpha)
+        if self.top_k is not None:
+            edges = top_k_edges(edges, self.top_k)
+
+        graph.edges = edges
+        return graph
@@ -0,0 +1,72 @@
+from graph import Graph
+from pymongo import MongoClient, UpdateOne
+import os
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def backfill(db, batch_size=1000):
+    """
+    Rebuild tag_stats, tag_pairs and tag_stats_meta from every stored
+    question, for databases filled before the TagStatsPipeline existed.
+    Totals are overwritten, so the crawler must not run meanwhile.
+
+    params:
+        - db (mongo database): the stackoverflowdataset database.
+        - batch_size (int): updates sent per bulk write.
+
+    returns:
+        - int: number of questions counted.
+    """
+
+    graph = Graph()
+    count = 0
+    for doc in db.stackoverflowdataset.find():
+        graph.add_document(doc)
+        count += 1
+
+    tags = [
+        UpdateOne(
+            {"_id": tag},
+            {
+                "$set": {
+                    "views": node.views,
+                    "answers": node.answers,
+                    "votes": node.votes,
+                    "weight": node.weight,
+                }
+            },
+            upsert=True,
+        )
+        for tag, node in graph.nodes.items()
+    ]
+    for batch in chunks(tags, batch_size):
+        db.tag_stats.bulk_write(batch, ordered=False)
+
+    # Graph.add_document stores pairs sorted, like the pipeline.
+    pairs = [
+        UpdateOne(
+            {"source": n1, "target": n2}, {"$set": {"weight": weight}}, upsert=True
+        )
+        for (n1, n2), weight in graph.edges.items()
+    ]
+    for batch in chunks(pairs, batch_size):
+        db.tag_pairs.bulk_write(batch, ordered=False)
+
+    db.tag_stats_meta.update_one(
+        {"_id": "questions"}, {"$set": {"count": count}}, upsert=True
+    )
+    return count
+
+
+def main():
+    client = MongoClient(os.getenv("MONGO_URI") or "mongodb://mongo_app:27017/")
+    count = backfill(client["stackoverflowdataset"])
+    print("counted {} questions".format(count))
+
+
+if __name__ == "__main__":
+    main()
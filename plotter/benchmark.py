@@ -0,0 +1,172 @@
+from backbone import EdgeFilter
+from corpus import generate
+from graph import Graph
+from plotter import Plotter
+from profiling import Profiler
+import argparse
+import json
+import platform
+import sys
+import time
+
+
+def run(
+    size,
+    max_tags,
+    vocabulary,
+    seed,
+    layout=True,
+    edge_filter=None,
+    workers=None,
+    min_nodes=500,
+    trace_memory=False,
+):
+    """
+    Run every plotter stage on a synthetic corpus of the given size.
+
+    returns:
+        - dict: measurements per stage.
+    """
+
+    profiler = Profiler(trace_memory=trace_memory)
+
+    # the stages only need raw_graph, so skip the mongo connection made
+    # in __init__.
+    plotter = Plotter.__new__(Plotter)
+
+    profiler.start()
+    graph = Graph()
+    with profiler.stage("add_document"):
+        # documents are streamed so large corpora never sit in memory, and
+        # the time spent generating them is reported as its own stage.
+        docs = generate(size, vocabulary=vocabulary, seed=seed)
+        for doc in profiler.iterate("generate", docs):
+            graph.add_document(doc)
+
+    with profiler.stage("trim_raw_graph"):
+        plotter.raw_graph = plotter.trim_raw_graph(graph, max_tags)
+
+    if edge_filter is not None:
+        with profiler.stage("edge_filter"):
+            plotter.raw_graph = edge_filter.apply(plotter.raw_graph)
+
+    with profiler.stage("c_style_arrays"):
+        nodes, edges, nodes_labels, edges_labels = plotter.c_style_arrays()
+
+    with profiler.stage("attr"):
+        max_we, min_we = plotter.minmax_weights()
+        max_vo, min_vo = plotter.minmax_votes()
+        max_vi, max_an, min_an = plotter.max_views_answers()
+        sizes, colors = plotter.attr(
+            nodes, max_we, min_we, max_vo, min_vo, max_vi, max_an, min_an
+        )
+
+    if layout:
+        with profiler.stage("gen_data_layout"):
+            plotter.gen_data_layout(
+                len(nodes),
+                edges,
+                sizes,
+                nodes_labels,
+                edges_labels,
+                colors,
+                workers=workers,
+                min_nodes=min_nodes,
+            )
+
+    profiler.stop()
+    return profiler.stages
+
+
+def measure(size, *args, memory=True):
+    """
+    Time every stage in a run without tracing, then, unless memory is
+    False, take the memory peaks from a second, traced run of the same
+    corpus.
+
+    params:
+        - size (int): corpus size.
+        - args: remaining arguments of run.
+        - memory (bool): whether to do the traced run.
+
+    returns:
+        - dict: measurements per stage.
+    """
+
+    stages = run(size, *args, trace_memory=False)
+    if memory:
+        peaks = run(size, *args, trace_memory=True)
+        for stage, result in stages.items():
+            result["peak_bytes"] = peaks[stage]["peak_bytes"]
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the plotter stages on synthetic corpora."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--max-tags", type=int, default=35)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-layout", action="store_true")
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the traced memory run"
+    )
+    parser.add_argument("--layout-workers", type=int)
+    parser.add_argument("--layout-min-nodes", type=int, default=500)
+    parser.add_argument("--edge-min-weight", type=int)
+    parser.add_argument("--edge-alpha", type=float)
+    parser.add_argument("--edge-top-k", type=int)
+    parser.add_argument("--output", help="json file, defaults to stdout")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "max_tags": args.max_tags,
+        "vocabulary": args.vocabulary,
+        "seed": args.seed,
+        "runs": [],
+    }
+
+    edge_filter = EdgeFilter(
+        min_weight=args.edge_min_weight, alpha=args.edge_alpha, top_k=args.edge_top_k
+    )
+
+    for size in args.sizes:
+        stages = measure(
+            size,
+            args.max_tags,
+            args.vocabulary,
+            args.seed,
+            not args.no_layout,
+            edge_filter,
+            args.layout_workers,
+            args.layout_min_nodes,
+            memory=not args.no_memory,
+        )
+        report["runs"].append({"size": size, "stages": stages})
+        for stage, result in stages.items():
+            print(
+                "{:>10} {:<16} {:>10.3f}s {:>10.3f}s {:>12} B".format(
+                    size,
+                    stage,
+                    result["seconds"],
+                    result["cpu_seconds"],
+                    "-" if result["peak_bytes"] is None else result["peak_bytes"],
+                ),
+                file=sys.stderr,
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import itertools
+import random
+
+
+def zipf_cum_weights(vocabulary, exponent):
+    """
+    Cumulative weights of a Zipf distribution over ranks 1..vocabulary.
+
+    params:
+        - vocabulary (int): number of distinct tags.
+        - exponent (float): skew, 1.0 is classic Zipf.
+
+    returns:
+        - list(float): cumulative weights usable by random.choices.
+    """
+
+    return list(
+        itertools.accumulate(1 / rank ** exponent for rank in range(1, vocabulary + 1))
+    )
+
+
+def generate(size, vocabulary=50000, exponent=1.1, seed=0):
+    """
+    Deterministically generate documents shaped like the ones stored by
+    the scraper. Tags follow a Zipf distribution, each question has 1 to 5
+    distinct tags and views and votes are heavy tailed.
+
+    params:
+        - size (int): number of documents.
+        - vocabulary (int): number of distinct tags.
+        - exponent (float): skew of the tag distribution.
+        - seed (int): the same seed always yields the same corpus.
+
+    yields:
+        - dict: document with views, answers, votes and tags.
+    """
+
+    rng = random.Random(seed)
+    tags = ["tag{}".format(rank) for rank in range(vocabulary)]
+    cum_weights = zipf_cum_weights(vocabulary, exponent)
+
+    for _ in range(size):
+        n_tags = rng.randint(1, min(5, vocabulary))
+        doc_tags = []
+        while len(doc_tags) < n_tags:
+            tag = rng.choices(tags, cum_weights=cum_weights)[0]
+            if tag not in doc_tags:
+                doc_tags.append(tag)
+
+        votes = int(rng.paretovariate(1.5)) - 1
+        if rng.random() < 0.1:
+            votes = -rng.randint(1, 5)
+
+        yield {
+            "views": int(10 * rng.paretovariate(1.1)),
+            "answers": int(rng.paretovariate(2.0)),
+            "votes": votes,
+            "tags": doc_tags,
+        }
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
 import itertools
 
@@ -54,8 +54,8 @@ class Graph:
             times they were used together.
     """
 
-    nodes = defaultdict(Node)
-    edges = defaultdict(int)
+    nodes: dict = field(default_factory=lambda: defaultdict(Node))
+    edges: dict = field(default_factory=lambda: defaultdict(int))
 
     def add_document(self, doc):
         """
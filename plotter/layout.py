@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import igraph as ig
+import math
+
+
+def components(N, edges):
+    """
+    Split the graph into connected components with a union find.
+
+    params:
+        - N (int): number of nodes.
+        - edges (list(tuple(int))): list of tuples of indices of nodes.
+
+    returns:
+        - list(list(int)): node indices per component, largest first.
+    """
+
+    parent = list(range(N))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for n1, n2 in edges:
+        r1, r2 = find(n1), find(n2)
+        if r1 != r2:
+            parent[r1] = r2
+
+    groups = {}
+    for i in range(N):
+        groups.setdefault(find(i), []).append(i)
+
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def layout_graph(N, edges):
+    """
+    Kamada-Kawai layout of a whole graph in 3 dimensions.
+
+    returns:
+        - list(list(float)): coordinates per node index.
+    """
+
+    if N == 1:
+        return [[0.0, 0.0, 0.0]]
+
+    G = ig.Graph(n=N, edges=edges, directed=False)
+    return [list(coords) for coords in G.layout("kk", dim=3)]
+
+
+def _layout_batch(jobs):
+    # process pool entry point, lays out a batch of (N, edges) components.
+    return [layout_graph(*job) for job in jobs]
+
+
+def batches(jobs, batch_nodes=64):
+    """
+    Group layout jobs into pool tasks. A component of batch_nodes nodes or
+    more is a task of its own, so the largest ones, which dominate the
+    cost, are spread over the workers; smaller ones are grouped up to
+    batch_nodes nodes per task to save the round trips.
+
+    params:
+        - jobs (list(tuple)): (N, edges) per component, largest first.
+        - batch_nodes (int): nodes per task of small components.
+
+    returns:
+        - list(list(tuple)): jobs per task, in the order of jobs.
+    """
+
+    tasks = []
+    size = batch_nodes
+    for job in jobs:
+        if size >= batch_nodes:
+            tasks.append([])
+            size = 0
+        tasks[-1].append(job)
+        size += job[0]
+    return tasks
+
+
+def pack(layouts, gap=1.0):
+    """
+    Translate component layouts into non overlapping regions. Each
+    component is centered and given a square cell in the x-y plane sized
+    by its extent; cells are filled row by row, largest first, so the
+    overall shape stays roughly square.
+
+    params:
+        - layouts (list(list(list(float)))): coordinates per component,
+            largest component first.
+        - gap (float): space between two cells.
+
+    returns:
+        - list(list(list(float))): translated coordinates per component.
+    """
+
+    centered = []
+    for coords in layouts:
+        center = [sum(c[axis] for c in coords) / len(coords) for axis in range(3)]
+        coords = [[c[axis] - center[axis] for axis in range(3)] for c in coords]
+        radius = max(math.sqrt(x * x + y * y + z * z) for x, y, z in coords)
+        centered.append((coords, 2 * radius + gap))
+
+    row_width = math.sqrt(sum(size * size for _, size in centered))
+    x = y = row_height = 0.0
+    packed = []
+    for coords, size in centered:
+        if x > 0 and x + size > row_width:
+            x, y = 0.0, y + row_height
+            row_height = 0.0
+
+        cx, cy = x + size / 2, y + size / 2
+        packed.append([[c[0] + cx, c[1] + cy, c[2]] for c in coords])
+        x += size
+        row_height = max(row_height, size)
+
+    return packed
+
+
+def component_layout(N, edges, workers=None, min_nodes=500):
+    """
+    Lay out each connected component independently in a process pool and
+    pack the results. Graphs smaller than min_nodes or with a single
+    component use one layout call, where a pool would only add overhead.
+
+    params:
+        - N (int): number of nodes.
+        - edges (list(tuple(int))): list of tuples of indices of nodes.
+        - workers (int): processes in the pool, defaults to the cpu count.
+        - min_nodes (int): smallest graph laid out per component.
+
+    returns:
+        - list(list(float)): coordinates per node index.
+    """
+
+    groups = components(N, edges)
+    if N < min_nodes or len(groups) == 1:
+        return layout_graph(N, edges)
+
+    # renumber every component from 0 so it can be laid out on its own.
+    component_of = {}
+    local = {}
+    for c, group in enumerate(groups):
+        for i, node in enumerate(group):
+            component_of[node] = c
+            local[node] = i
+    component_edges = [[] for _ in groups]
+    for n1, n2 in edges:
+        component_edges[component_of[n1]].append((local[n1], local[n2]))
+
+    # isolated tags are common after edge filtering and need no layout.
+    jobs = [
+        (len(group), e) for group, e in zip(groups, component_edges) if len(group) > 1
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # one task at a time, a chunk of tasks would run in a single worker.
+        laid_out = chain.from_iterable(pool.map(_layout_batch, batches(jobs)))
+        layouts = [
+            next(laid_out) if len(group) > 1 else [[0.0, 0.0, 0.0]]
+            for group in groups
+        ]
+
+    layt = [None] * N
+    for group, coords in zip(groups, pack(layouts)):
+        for node, xyz in zip(group, coords):
+            layt[node] = xyz
+
+    return layt
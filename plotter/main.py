@@ -1,14 +1,91 @@
+from backbone import EdgeFilter
 from plotter import Plotter
+from profiling import Profiler
+import argparse
 import os
 
 
+def env_flag(name):
+    """
+    Read a boolean environment variable, so that e.g. MATERIALIZED=0
+    leaves the option off.
+    """
+
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Plot the scraped tags.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=env_flag("PROFILE"),
+        help="time each stage and print a summary (or set PROFILE=1)",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default=os.getenv("PROFILE_OUTPUT"),
+        help="dump a cProfile of the run to this pstats file",
+    )
+    # edges between the top tags are reduced to their backbone, each filter
+    # is only applied when set.
+    parser.add_argument(
+        "--edge-min-weight",
+        type=int,
+        default=os.getenv("EDGE_MIN_WEIGHT"),
+        help="drop edges between tags used together fewer times",
+    )
+    parser.add_argument(
+        "--edge-alpha",
+        type=float,
+        default=os.getenv("EDGE_ALPHA"),
+        help="significance level of the disparity filter, e.g. 0.05",
+    )
+    parser.add_argument(
+        "--edge-top-k",
+        type=int,
+        default=os.getenv("EDGE_TOP_K"),
+        help="keep only the k strongest edges of each tag",
+    )
+    parser.add_argument(
+        "--layout-workers",
+        type=int,
+        default=os.getenv("LAYOUT_WORKERS"),
+        help="lay out connected components in parallel with this many processes",
+    )
+    parser.add_argument(
+        "--layout-min-nodes",
+        type=int,
+        default=os.getenv("LAYOUT_MIN_NODES") or 500,
+        help="smallest graph laid out in parallel when --layout-workers is set",
+    )
+    args = parser.parse_args()
+
+    profiler = Profiler(
+        enabled=args.profile or bool(args.profile_output),
+        pstats_path=args.profile_output,
+    )
+    edge_filter = EdgeFilter(
+        min_weight=args.edge_min_weight, alpha=args.edge_alpha, top_k=args.edge_top_k
+    )
+
+    profiler.start()
+
     plotter = Plotter(
         os.getenv("MONGO_URI") or "mongodb://mongo_app:27017/",
-        os.getenv("MAX_TAGS") or 35,
+        int(os.getenv("MAX_TAGS") or 35),
+        materialized=env_flag("MATERIALIZED"),
+        profiler=profiler,
+        edge_filter=edge_filter,
+        layout_workers=args.layout_workers,
+        layout_min_nodes=args.layout_min_nodes,
     )
     plotter.create_graph()
 
+    profiler.stop()
+    if profiler.enabled:
+        print(profiler.summary())
+
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,9 @@
 from pymongo import MongoClient
-from graph import Graph
+from graph import Graph, Node
+from profiling import Profiler
 import plotly.graph_objects as go
 import plotly.io as pio
-import igraph as ig
+from layout import component_layout, layout_graph
 
 
 class Plotter:
@@ -13,11 +14,34 @@ class Plotter:
     attr:
         - db (mongo database): Pointer to an opened mongodb database.
         - raw_graph (Graph): Processed data retrieved from db.
+        - profiler (Profiler): measures each stage, disabled by default.
+        - layout_workers (int): if set, connected components are laid out
+            in parallel by that many processes.
+        - layout_min_nodes (int): smallest graph laid out in parallel.
     """
 
-    def __init__(self, mongo_uri, max_tags):
+    def __init__(
+        self,
+        mongo_uri,
+        max_tags,
+        materialized=False,
+        profiler=None,
+        edge_filter=None,
+        layout_workers=None,
+        layout_min_nodes=500,
+    ):
+        self.profiler = profiler or Profiler(enabled=False)
+        self.layout_workers = layout_workers
+        self.layout_min_nodes = layout_min_nodes
         self.db = self.mongo_setup(mongo_uri)
-        self.raw_graph = self.process_data(max_tags)
+        if materialized:
+            self.raw_graph = self.load_materialized(max_tags)
+        else:
+            self.raw_graph = self.process_data(max_tags)
+
+        if edge_filter is not None:
+            with self.profiler.stage("edge filter"):
+                self.raw_graph = edge_filter.apply(self.raw_graph)
 
     def process_data(self, max_tags):
         """
@@ -33,10 +57,73 @@ class Plotter:
         """
 
         raw_graph = Graph()
-        for doc in self.db.stackoverflowdataset.find():
-            raw_graph.add_document(doc)
+        with self.profiler.stage("graph build"):
+            docs = self.db.stackoverflowdataset.find()
+            for doc in self.profiler.iterate("mongo read", docs):
+                raw_graph.add_document(doc)
+
+        with self.profiler.stage("trim"):
+            return self.trim_raw_graph(raw_graph, max_tags)
+
+    def load_materialized(self, max_tags):
+        """
+        Build the graph from the tag_stats and tag_pairs collections kept
+        up to date by the TagStatsPipeline while crawling, instead of
+        scanning every question.
+
+        params:
+            - max_tags (int): only the top max_tags will be kept to display.
 
-        return self.trim_raw_graph(raw_graph, max_tags)
+        returns:
+            - Graph: the same structure process_data returns.
+
+        raises:
+            - RuntimeError: if the counters miss questions stored before
+                the pipeline was enabled, see backfill.py.
+        """
+
+        self.check_materialized()
+
+        raw_graph = Graph()
+        with self.profiler.stage("mongo read"):
+            top_tags = self.db.tag_stats.find().sort("weight", -1).limit(max_tags)
+            for doc in top_tags:
+                raw_graph.nodes[doc["_id"]] = Node(
+                    views=doc["views"],
+                    answers=doc["answers"],
+                    votes=doc["votes"],
+                    weight=doc["weight"],
+                )
+
+            tags = list(raw_graph.nodes.keys())
+            pairs = self.db.tag_pairs.find(
+                {"source": {"$in": tags}, "target": {"$in": tags}}
+            )
+            for doc in pairs:
+                raw_graph.edges[(doc["source"], doc["target"])] = doc["weight"]
+
+        with self.profiler.stage("trim"):
+            return self.trim_raw_graph(raw_graph, max_tags)
+
+    def check_materialized(self):
+        """
+        Make sure tag_stats covers the questions collection. While crawling
+        the counters lag behind by the batches not flushed yet, so a small
+        difference is accepted.
+
+        raises:
+            - RuntimeError: if too many questions are not counted.
+        """
+
+        meta = self.db.tag_stats_meta.find_one({"_id": "questions"}) or {}
+        counted = meta.get("count", 0)
+        stored = self.db.stackoverflowdataset.estimated_document_count()
+
+        if stored - counted > max(1000, stored // 100):
+            raise RuntimeError(
+                "tag_stats only covers {} of {} questions, run "
+                "plotter/backfill.py first".format(counted, stored)
+            )
 
     def trim_raw_graph(self, graph, max_tags):
         """
@@ -88,29 +175,49 @@ class Plotter:
 
         N = len(self.raw_graph.nodes)
 
-        # load all min and max ranges to scale node sizes
-        max_we, min_we = self.minmax_weights()
-        max_vo, min_vo = self.minmax_votes()
-        max_vi, max_an, min_an = self.max_views_answers()
-
-        # igraph stores nodes and edges as C-style arrays indexed by int.
-        # labels and attributes correspond to the ordered indeces.
-        nodes, edges, nodes_labels, edges_labels = self.c_style_arrays()
+        with self.profiler.stage("attributes"):
+            # load all min and max ranges to scale node sizes
+            max_we, min_we = self.minmax_weights()
+            max_vo, min_vo = self.minmax_votes()
+            max_vi, max_an, min_an = self.max_views_answers()
 
-        # generate sizes and colors of nodes in indexed arrays.
-        sizes, colors = self.attr(
-            nodes, max_we, min_we, max_vo, min_vo, max_vi, max_an, min_an
-        )
+            # igraph stores nodes and edges as C-style arrays indexed by int.
+            # labels and attributes correspond to the ordered indeces.
+            nodes, edges, nodes_labels, edges_labels = self.c_style_arrays()
 
-        # load the data with all c-style arrays.
-        data, layout = self.gen_data_layout(
-            N, edges, sizes, nodes_labels, edges_labels, colors
-        )
+            # generate sizes and colors of nodes in indexed arrays.
+            sizes, colors = self.attr(
+                nodes, max_we, min_we, max_vo, min_vo, max_vi, max_an, min_an
+            )
 
-        fig = go.Figure(data=data, layout=layout)
-        pio.write_html(fig, "plot.html", auto_open=True)
+        with self.profiler.stage("layout"):
+            # load the data with all c-style arrays.
+            data, layout = self.gen_data_layout(
+                N,
+                edges,
+                sizes,
+                nodes_labels,
+                edges_labels,
+                colors,
+                workers=self.layout_workers,
+                min_nodes=self.layout_min_nodes,
+            )
 
-    def gen_data_layout(self, N, edges, sizes, nodes_labels, edges_labels, colors):
+        with self.profiler.stage("html"):
+            fig = go.Figure(data=data, layout=layout)
+            pio.write_html(fig, "plot.html", auto_open=True)
+
+    def gen_data_layout(
+        self,
+        N,
+        edges,
+        sizes,
+        nodes_labels,
+        edges_labels,
+        colors,
+        workers=None,
+        min_nodes=500,
+    ):
         """
         This method generates the data containing the coordinates of all nodes
         and their corresponding edges as well as the layout.
@@ -122,13 +229,19 @@ class Plotter:
             - nodes_labels (list(str)): list of descriptions of nodes.
             - edges_labels (list(int)): list of weight of edges.
             - colors (list(str)): list of rgb colors according to attributes.
+            - workers (int): lay out connected components in parallel with
+                this many processes, or the whole graph at once if None.
+            - min_nodes (int): graphs with fewer nodes are laid out at once
+                even if workers is set.
 
         returns:
             - data (list(Scatter3d)): list of coordinates and attributes.
             - layout
         """
-        G = ig.Graph(edges, directed=False)
-        layt = G.layout("kk", dim=3)
+        if workers is None:
+            layt = layout_graph(N, edges)
+        else:
+            layt = component_layout(N, edges, workers=workers, min_nodes=min_nodes)
 
         Xn, Yn, Zn = self.gen_xyzn(layt, N)
         Xe, Ye, Ze = self.gen_xyze(layt, edges)
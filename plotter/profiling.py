@@ -0,0 +1,192 @@
+from contextlib import contextmanager
+import cProfile
+import time
+import tracemalloc
+
+# tracemalloc.reset_peak only exists since python 3.9.
+HAS_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+class Profiler:
+    """
+    Profiler measures named stages of a plotter run: wall time, cpu time
+    and the peak memory traced by tracemalloc above the level at which the
+    stage started. A disabled profiler costs nothing, so stages can always
+    be wrapped.
+
+    attr:
+        - enabled (bool): whether anything is measured at all.
+        - pstats_path (str): if set, a cProfile of the whole run between
+            start and stop is dumped to this file.
+        - trace_memory (bool): whether peaks are traced. Tracing slows
+            python code down several times, so timings taken while tracing
+            are inflated.
+        - stages (dict): stage name -> {"seconds", "cpu_seconds",
+            "peak_bytes"}, in the order the stages first ran.
+    """
+
+    def __init__(self, enabled=True, pstats_path=None, trace_memory=True):
+        self.enabled = enabled
+        self.pstats_path = pstats_path
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._frames = []
+        self._profile = None
+        self._offset = 0
+
+    def start(self):
+        if not self.enabled:
+            return
+
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.pstats_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if not self.enabled:
+            return
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.pstats_path)
+            self._profile = None
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure the enclosed block as stage name. Time spent in nested
+        stages and iterate calls is reported under their own name only,
+        while memory peaks of nested stages also count for the enclosing
+        ones.
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        frame = {"seconds": 0.0, "cpu_seconds": 0.0, "baseline": 0, "peak": 0}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # resetting the peak would lose the peak reached so far by the
+            # enclosing stages, so hand it to them first.
+            self.propagate_peak()
+            self.reset_peak()
+            frame["baseline"] = frame["peak"] = self.traced_memory()[0]
+
+        self._frames.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            peak = None
+            if self.trace_memory:
+                self.propagate_peak()
+                peak = frame["peak"] - frame["baseline"]
+            self._frames.pop()
+
+            if self._frames:
+                self._frames[-1]["seconds"] += wall
+                self._frames[-1]["cpu_seconds"] += cpu
+            self.record(
+                name, wall - frame["seconds"], cpu - frame["cpu_seconds"], peak
+            )
+
+    def iterate(self, name, iterable):
+        """
+        Yield from iterable, measuring the time spent producing items as
+        stage name, e.g. reading documents from a mongo cursor while the
+        consumer builds the graph.
+        """
+
+        if not self.enabled:
+            yield from iterable
+            return
+
+        iterator = iter(iterable)
+        wall = cpu = 0.0
+        while True:
+            w, c = time.perf_counter(), time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                wall += time.perf_counter() - w
+                cpu += time.process_time() - c
+            yield item
+
+        if self._frames:
+            self._frames[-1]["seconds"] += wall
+            self._frames[-1]["cpu_seconds"] += cpu
+        self.record(name, wall, cpu, None)
+
+    def record(self, name, seconds, cpu_seconds, peak_bytes):
+        result = self.stages.setdefault(
+            name, {"seconds": 0.0, "cpu_seconds": 0.0, "peak_bytes": None}
+        )
+        result["seconds"] += seconds
+        result["cpu_seconds"] += cpu_seconds
+        if peak_bytes is not None:
+            result["peak_bytes"] = max(result["peak_bytes"] or 0, peak_bytes)
+
+    def propagate_peak(self):
+        peak = self.traced_memory()[1]
+        for frame in self._frames:
+            frame["peak"] = max(frame["peak"], peak)
+
+    def traced_memory(self):
+        """
+        Current and peak traced memory, including the memory that was
+        traced before a restart of tracemalloc in reset_peak.
+        """
+
+        current, peak = tracemalloc.get_traced_memory()
+        return current + self._offset, peak + self._offset
+
+    def reset_peak(self):
+        if HAS_RESET_PEAK:
+            tracemalloc.reset_peak()
+        else:
+            # restarting forgets every traced block, so carry the current
+            # size over. Blocks allocated before and freed after the
+            # restart are not subtracted anymore.
+            self._offset += tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            tracemalloc.start()
+
+    def summary(self):
+        """
+        Format all recorded stages as a table.
+
+        returns:
+            - str: one line per stage plus a total.
+        """
+
+        lines = ["{:<16} {:>10} {:>10} {:>12}".format(
+            "stage", "wall (s)", "cpu (s)", "peak (MiB)")]
+        for name, result in self.stages.items():
+            peak = result["peak_bytes"]
+            lines.append(
+                "{:<16} {:>10.3f} {:>10.3f} {:>12}".format(
+                    name,
+                    result["seconds"],
+                    result["cpu_seconds"],
+                    "-" if peak is None else "{:.1f}".format(peak / 2 ** 20),
+                )
+            )
+
+        lines.append(
+            "{:<16} {:>10.3f} {:>10.3f}".format(
+                "total",
+                sum(r["seconds"] for r in self.stages.values()),
+                sum(r["cpu_seconds"] for r in self.stages.values()),
+            )
+        )
+        return "\n".join(lines)
@@ -0,0 +1,194 @@
+from backbone import EdgeFilter
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from layout import component_layout, layout_graph
+from main import env_flag
+from plotter import Plotter
+from slices import GraphSlices
+from urllib.parse import parse_qs, urlparse
+import argparse
+import os
+import plotly.offline
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@lru_cache(maxsize=1)
+def plotlyjs():
+    """
+    The plotly.js bundled with the installed plotly, so the page works
+    offline and loads no third party script.
+
+    returns:
+        - bytes
+    """
+
+    return plotly.offline.get_plotlyjs().encode()
+
+
+def count(params, name, default=None):
+    """
+    Non negative integer query parameter.
+
+    params:
+        - params (Dict[str, str]): query parameters.
+        - name (str): parameter to read.
+        - default (int): value when the parameter is missing.
+
+    returns:
+        - int
+    """
+
+    if name not in params:
+        return default
+    value = int(params[name])
+    if value < 0:
+        raise ValueError("{} must not be negative".format(name))
+    return value
+
+
+class SliceHandler(BaseHTTPRequestHandler):
+    """
+    Serves the front end and json slices of the graph loaded by the server:
+
+        - /slice/top?n=100
+        - /slice/cutoff?min_weight=50&limit=2000
+        - /slice/neighborhood?tag=python&depth=1&limit=20
+
+    Larger slices than the server allows are cut down by GraphSlices and
+    negative sizes are rejected.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path in ("/", "/index.html"):
+            with open(os.path.join(STATIC_DIR, "index.html"), "rb") as f:
+                self.send(200, "text/html; charset=utf-8", f.read())
+            return
+
+        if url.path == "/plotly.min.js":
+            self.send(200, "application/javascript; charset=utf-8", plotlyjs())
+            return
+
+        try:
+            if url.path == "/slice/top":
+                args = ("top", count(params, "n", 100))
+            elif url.path == "/slice/cutoff":
+                args = (
+                    "cutoff",
+                    count(params, "min_weight", 1),
+                    count(params, "limit"),
+                )
+            elif url.path == "/slice/neighborhood":
+                args = (
+                    "neighborhood",
+                    params["tag"],
+                    count(params, "depth", 1),
+                    count(params, "limit"),
+                )
+            else:
+                self.send(404, "text/plain", b"not found")
+                return
+        except (KeyError, ValueError) as e:
+            self.send(400, "text/plain", "bad parameter: {}".format(e).encode())
+            return
+
+        self.send(200, "application/json", self.server.slices.render(*args))
+
+    def send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def load_slices(plotter, layout_workers=None, layout_min_nodes=500, **limits):
+    """
+    Lay out the graph of plotter once and index it for slicing.
+
+    params:
+        - plotter (Plotter): plotter with the aggregated graph loaded.
+        - layout_workers (int): processes used to lay out components.
+        - layout_min_nodes (int): smallest graph laid out in parallel.
+        - limits: cache_bytes, max_nodes and max_edges of GraphSlices.
+
+    returns:
+        - GraphSlices
+    """
+
+    graph = plotter.raw_graph
+    index = {tag: i for i, tag in enumerate(graph.nodes)}
+    edges = [(index[n1], index[n2]) for n1, n2 in graph.edges]
+
+    if layout_workers is None:
+        layt = layout_graph(len(index), edges)
+    else:
+        layt = component_layout(
+            len(index), edges, workers=layout_workers, min_nodes=layout_min_nodes
+        )
+
+    return GraphSlices(graph, layt, **limits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explore the tag graph.")
+    parser.add_argument("--host", default=os.getenv("HOST") or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=os.getenv("PORT") or 8050)
+    parser.add_argument(
+        "--max-tags", type=int, default=os.getenv("MAX_TAGS") or 10000
+    )
+    parser.add_argument(
+        "--cache-mb", type=int, default=64, help="memory for cached slices"
+    )
+    parser.add_argument(
+        "--max-nodes", type=int, default=2000, help="most tags in one slice"
+    )
+    parser.add_argument(
+        "--max-edges", type=int, default=20000, help="most edges in one slice"
+    )
+    parser.add_argument(
+        "--layout-workers", type=int, default=os.getenv("LAYOUT_WORKERS")
+    )
+    parser.add_argument(
+        "--layout-min-nodes", type=int, default=os.getenv("LAYOUT_MIN_NODES") or 500
+    )
+    parser.add_argument(
+        "--edge-min-weight", type=int, default=os.getenv("EDGE_MIN_WEIGHT")
+    )
+    parser.add_argument("--edge-alpha", type=float, default=os.getenv("EDGE_ALPHA"))
+    parser.add_argument("--edge-top-k", type=int, default=os.getenv("EDGE_TOP_K"))
+    args = parser.parse_args()
+
+    plotter = Plotter(
+        os.getenv("MONGO_URI") or "mongodb://mongo_app:27017/",
+        args.max_tags,
+        materialized=env_flag("MATERIALIZED"),
+        edge_filter=EdgeFilter(
+            min_weight=args.edge_min_weight,
+            alpha=args.edge_alpha,
+            top_k=args.edge_top_k,
+        ),
+    )
+
+    httpd = ThreadingHTTPServer((args.host, args.port), SliceHandler)
+    httpd.slices = load_slices(
+        plotter,
+        args.layout_workers,
+        args.layout_min_nodes,
+        cache_bytes=args.cache_mb << 20,
+        max_nodes=args.max_nodes,
+        max_edges=args.max_edges,
+    )
+    print(
+        "serving {} tags on http://{}:{}".format(
+            len(httpd.slices.tags), args.host, args.port
+        )
+    )
+    httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
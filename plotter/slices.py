@@ -0,0 +1,225 @@
+from collections import OrderedDict, deque
+import bisect
+import json
+import threading
+
+
+class SliceCache:
+    """
+    Least recently used cache of rendered slices bounded by the total size
+    of the cached bodies rather than their number, since one slice can be
+    a few hundred bytes or several megabytes. Bodies larger than the whole
+    budget are returned but not kept.
+
+    attr:
+        - max_bytes (int): budget for the cached bodies.
+        - size (int): bytes currently cached.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        # the server handles requests in threads.
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Cached value of key, computed and stored on a miss.
+
+        params:
+            - key: hashable cache key.
+            - compute (callable): builds the bytes when key is missing.
+
+        returns:
+            - bytes
+        """
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        body = compute()
+        if len(body) > self.max_bytes:
+            return body
+
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = body
+                self.size += len(body)
+            while self.size > self.max_bytes:
+                _, old = self.entries.popitem(last=False)
+                self.size -= len(old)
+        return body
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class GraphSlices:
+    """
+    GraphSlices holds an aggregated graph and its layout in memory and
+    answers level of detail queries from indices computed once:
+
+        - nodes ranked by weight, and edges sorted by the worse rank of
+          their two tags, so the top n tags and the edges among them are
+          two prefixes.
+        - edges sorted by weight, so a weight cutoff is a prefix.
+        - per tag adjacency lists sorted by weight for neighborhoods.
+
+    Every slice is capped at max_nodes tags and max_edges edges, whatever
+    was asked for, and rendered responses are kept in a SliceCache.
+
+    attr:
+        - tags (list(str)): tag per node id, ordered by weight.
+        - ids (Dict[str, int]): node id per tag.
+        - max_nodes (int): most tags returned by top.
+        - max_edges (int): most edges returned by any slice.
+    """
+
+    def __init__(
+        self, graph, layt, cache_bytes=64 << 20, max_nodes=2000, max_edges=20000
+    ):
+        """
+        params:
+            - graph (Graph): aggregated (and possibly filtered) graph.
+            - layt: coordinates per tag, in the order of graph.nodes.
+            - cache_bytes (int): size of the rendered slices kept.
+            - max_nodes (int): most tags returned by top.
+            - max_edges (int): most edges returned by any slice.
+        """
+
+        self.max_nodes = max_nodes
+        self.max_edges = max_edges
+
+        coords = dict(zip(graph.nodes.keys(), layt))
+        self.tags = sorted(
+            graph.nodes, key=lambda tag: graph.nodes[tag].weight, reverse=True
+        )
+        self.ids = {tag: i for i, tag in enumerate(self.tags)}
+        self.nodes = [
+            {
+                "id": i,
+                "tag": tag,
+                "x": coords[tag][0],
+                "y": coords[tag][1],
+                "z": coords[tag][2],
+                "weight": graph.nodes[tag].weight,
+                "views": graph.nodes[tag].views,
+                "answers": graph.nodes[tag].answers,
+                "votes": graph.nodes[tag].votes,
+            }
+            for i, tag in enumerate(self.tags)
+        ]
+
+        edges = [
+            (self.ids[n1], self.ids[n2], weight)
+            for (n1, n2), weight in graph.edges.items()
+        ]
+
+        self.edges_by_rank = sorted(edges, key=lambda e: max(e[0], e[1]))
+        self.edge_ranks = [max(e[0], e[1]) for e in self.edges_by_rank]
+
+        self.edges_by_weight = sorted(edges, key=lambda e: e[2], reverse=True)
+        self.edge_weights = [-e[2] for e in self.edges_by_weight]
+
+        self.adjacency = [[] for _ in self.tags]
+        for n1, n2, weight in edges:
+            self.adjacency[n1].append((weight, n2))
+            self.adjacency[n2].append((weight, n1))
+        for neighbors in self.adjacency:
+            neighbors.sort(reverse=True)
+
+        self.cache = SliceCache(cache_bytes)
+
+    def top(self, n):
+        """
+        The n heaviest tags and the edges among them, those of the heaviest
+        tags first.
+        """
+
+        n = min(n, len(self.nodes), self.max_nodes)
+        end = min(bisect.bisect_left(self.edge_ranks, n), self.max_edges)
+        return {"nodes": self.nodes[:n], "edges": self.edges_by_rank[:end]}
+
+    def cutoff(self, min_weight, limit=None):
+        """
+        Edges used at least min_weight times, at most limit (and never
+        more than max_edges) of them, and their tags. Edges are taken
+        strongest first until the next one would bring in more than
+        max_nodes tags.
+        """
+
+        end = bisect.bisect_right(self.edge_weights, -min_weight)
+        if limit is not None:
+            end = min(end, limit)
+        end = min(end, self.max_edges)
+
+        ids = set()
+        for taken, (n1, n2, _) in enumerate(self.edges_by_weight[:end]):
+            if len(ids) + (n1 not in ids) + (n2 not in ids) > self.max_nodes:
+                end = taken
+                break
+            ids.update((n1, n2))
+
+        return {
+            "nodes": [self.nodes[i] for i in sorted(ids)],
+            "edges": self.edges_by_weight[:end],
+        }
+
+    def neighborhood(self, tag, depth=1, limit=None):
+        """
+        Tags reachable from tag in depth steps, following at most limit
+        strongest edges of each tag, and the strongest max_edges edges among
+        them. The search stops once max_nodes tags were reached.
+        """
+
+        if tag not in self.ids:
+            return {"nodes": [], "edges": []}
+
+        start = self.ids[tag]
+        distance = {start: 0}
+        queue = deque([start])
+        while queue and len(distance) < self.max_nodes:
+            node = queue.popleft()
+            if distance[node] == depth:
+                continue
+            for _, other in self.adjacency[node][:limit]:
+                if len(distance) == self.max_nodes:
+                    break
+                if other not in distance:
+                    distance[other] = distance[node] + 1
+                    queue.append(other)
+
+        edges = [
+            (node, other, weight)
+            for node in distance
+            for weight, other in self.adjacency[node]
+            if node < other and other in distance
+        ]
+        if len(edges) > self.max_edges:
+            edges.sort(key=lambda e: e[2], reverse=True)
+            del edges[self.max_edges :]
+        return {
+            "nodes": [self.nodes[i] for i in sorted(distance)],
+            "edges": edges,
+        }
+
+    def render(self, kind, *args):
+        """
+        Serialized slice, served from the cache when possible.
+
+        params:
+            - kind (str): one of "top", "cutoff" or "neighborhood".
+            - args: arguments of the method of the same name.
+
+        returns:
+            - bytes: the slice as json.
+        """
+
+        def serialize():
+            data = getattr(self, kind)(*args)
+            return json.dumps(data, separators=(",", ":")).encode()
+
+        return self.cache.get((kind,) + args, serialize)
@@ -0,0 +1,732 @@
+from array import array
+from bson import ObjectId
+from collections import Counter
+from collections.abc import MutableMapping
+from datetime import timedelta
+from itertools import chain
+import argparse
+import bisect
+import heapq
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+
+# positions of the set bits of every byte value.
+BYTE_BITS = [
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+]
+
+
+# lower bounds of the value buckets of the views, votes and answers columns,
+# four per power of two on both sides of zero, so that a threshold only has
+# to check the values of a single bucket one by one.
+POSITIVE_BOUNDS = sorted({int(2 ** (k / 4)) for k in range(4 * 63)})
+BOUNDS = (
+    [-(2 ** 63)] + [-b for b in reversed(POSITIVE_BOUNDS)] + [0] + POSITIVE_BOUNDS
+)
+
+COLUMNS = ("views", "votes", "answers")
+
+# the forward index, tag ids of every question, stored like the columns.
+FORWARD = ("question_tags", "question_offsets")
+
+# magic, offset and length of the pickled table of contents.
+HEADER = struct.Struct("<8sQQ")
+MAGIC = b"TAGIDX02"
+
+# high 16 bits and number of values of a container, -1 for a bit set.
+CONTAINER = struct.Struct("<Ii")
+
+
+def bucket(value):
+    return bisect.bisect_right(BOUNDS, value) - 1
+
+
+def popcount(x):
+    return bin(x).count("1")
+
+
+def bits_in(bits, lows):
+    """
+    The values of lows set in the bit set bits. Shifting a 65536 bit int
+    copies it, so bits are tested on its bytes instead.
+    """
+
+    data = bits.to_bytes(0x2000, "little")
+    return [low for low in lows if data[low >> 3] >> (low & 7) & 1]
+
+
+def set_bits(x):
+    """
+    Positions of the set bits of x in increasing order. Walks the bytes of
+    x since shifting or masking a 65536 bit int per bit copies it each time.
+    """
+
+    data = x.to_bytes((x.bit_length() + 7) // 8, "little")
+    for i, byte in enumerate(data):
+        if byte:
+            base = i << 3
+            for bit in BYTE_BITS[byte]:
+                yield base | bit
+
+
+class Bitmap:
+    """
+    Bitmap is a roaring style compressed set of non negative integers
+    below 2 ** 32. Values are grouped by their high 16 bits into containers.
+    Sparse containers are sorted arrays of the low 16 bits, containers with
+    more than ARRAY_MAX values become 65536 bit sets stored as python ints,
+    so intersections of dense containers are a single `&`.
+
+    attr:
+        - containers (Dict[int, array | int]): container per high 16 bits.
+    """
+
+    ARRAY_MAX = 4096
+
+    def __init__(self, values=()):
+        self.containers = {}
+        for value in sorted(values):
+            self.add(value)
+
+    def add(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+
+        if container is None:
+            self.containers[high] = array("H", [low])
+        elif isinstance(container, int):
+            self.containers[high] = container | (1 << low)
+        elif container[-1] < low:
+            # ordinals are mostly added in increasing order.
+            container.append(low)
+        else:
+            i = bisect.bisect_left(container, low)
+            if i == len(container) or container[i] != low:
+                container.insert(i, low)
+
+        container = self.containers[high]
+        if not isinstance(container, int) and len(container) > self.ARRAY_MAX:
+            bits = 0
+            for low in container:
+                bits |= 1 << low
+            self.containers[high] = bits
+
+    def __contains__(self, value):
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        i = bisect.bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __len__(self):
+        return sum(
+            popcount(c) if isinstance(c, int) else len(c)
+            for c in self.containers.values()
+        )
+
+    def __iter__(self):
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            base = high << 16
+            if isinstance(container, int):
+                for low in set_bits(container):
+                    yield base | low
+            else:
+                for low in container:
+                    yield base | low
+
+    def __and__(self, other):
+        result = Bitmap()
+        for high in self.containers.keys() & other.containers.keys():
+            container = intersect(self.containers[high], other.containers[high])
+            if container:
+                result.containers[high] = container
+        return result
+
+    def __or__(self, other):
+        return Bitmap.union([self, other])
+
+    @classmethod
+    def union(cls, bitmaps):
+        """
+        Union of many bitmaps at once. Per container the dense ones are
+        or-ed together and the sparse ones merged by a single set union,
+        instead of merging pairwise.
+        """
+
+        dense = {}
+        sparse = {}
+        for bitmap in bitmaps:
+            for high, container in bitmap.containers.items():
+                if isinstance(container, int):
+                    dense[high] = dense.get(high, 0) | container
+                else:
+                    sparse.setdefault(high, []).append(container)
+
+        result = cls()
+        for high in dense.keys() | sparse.keys():
+            lows = set().union(*sparse.get(high, ()))
+            if high in dense:
+                result.containers[high] = dense[high] | to_bits(lows)
+            elif len(lows) > cls.ARRAY_MAX:
+                result.containers[high] = to_bits(lows)
+            else:
+                result.containers[high] = array("H", sorted(lows))
+        return result
+
+    @classmethod
+    def full(cls, n):
+        """
+        Bitmap of range(n).
+        """
+
+        bitmap = cls()
+        for high in range((n + 0xFFFF) >> 16):
+            size = min(0x10000, n - (high << 16))
+            if size > cls.ARRAY_MAX:
+                bitmap.containers[high] = (1 << size) - 1
+            else:
+                bitmap.containers[high] = array("H", range(size))
+        return bitmap
+
+    def to_bytes(self):
+        """
+        Serialized containers, in the machine's byte order.
+        """
+
+        parts = []
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            if isinstance(container, int):
+                parts.append(CONTAINER.pack(high, -1))
+                parts.append(container.to_bytes(0x2000, "little"))
+            else:
+                parts.append(CONTAINER.pack(high, len(container)))
+                parts.append(container.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Bitmap serialized by to_bytes.
+
+        params:
+            - data (bytes | memoryview): the serialized containers.
+        """
+
+        bitmap = cls()
+        pos = 0
+        while pos < len(data):
+            high, n = CONTAINER.unpack_from(data, pos)
+            pos += CONTAINER.size
+            if n < 0:
+                container = int.from_bytes(data[pos : pos + 0x2000], "little")
+                pos += 0x2000
+            else:
+                container = array("H")
+                container.frombytes(data[pos : pos + 2 * n])
+                pos += 2 * n
+            bitmap.containers[high] = container
+        return bitmap
+
+    def intersection_len(self, other):
+        """
+        Number of values in both bitmaps without building the intersection.
+        """
+
+        total = 0
+        for high in self.containers.keys() & other.containers.keys():
+            c1, c2 = self.containers[high], other.containers[high]
+            if isinstance(c1, int) and isinstance(c2, int):
+                total += popcount(c1 & c2)
+            elif isinstance(c1, int):
+                total += len(bits_in(c1, c2))
+            elif isinstance(c2, int):
+                total += len(bits_in(c2, c1))
+            else:
+                total += len(set(c1).intersection(c2))
+        return total
+
+    def intersection_lens(self, others):
+        """
+        intersection_len against many bitmaps. The containers of self are
+        turned into sets once, so most tags cost a single C level set
+        intersection per container instead of a python loop.
+
+        yields:
+            - int: intersection size per bitmap in others.
+        """
+
+        lows = {}
+        for other in others:
+            total = 0
+            for high, c2 in other.containers.items():
+                c1 = self.containers.get(high)
+                if c1 is None:
+                    continue
+                if isinstance(c1, int) and isinstance(c2, int):
+                    total += popcount(c1 & c2)
+                elif isinstance(c2, int):
+                    total += len(bits_in(c2, c1))
+                else:
+                    if high not in lows:
+                        lows[high] = set(
+                            set_bits(c1) if isinstance(c1, int) else c1)
+                    total += len(lows[high].intersection(c2))
+            yield total
+
+
+def to_bits(container):
+    if isinstance(container, int):
+        return container
+    bits = bytearray(0x2000)
+    for low in container:
+        bits[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(bits, "little")
+
+
+def intersect(c1, c2):
+    """
+    Intersection of two containers, None if empty.
+    """
+
+    if isinstance(c1, int) and isinstance(c2, int):
+        bits = c1 & c2
+        if popcount(bits) > Bitmap.ARRAY_MAX:
+            return bits
+        return array("H", set_bits(bits)) or None
+
+    if isinstance(c1, int):
+        c1, c2 = c2, c1
+    if isinstance(c2, int):
+        lows = array("H", bits_in(c2, c1))
+    else:
+        lows = array("H", sorted(set(c1).intersection(c2)))
+    return lows or None
+
+
+class LazyBitmaps(MutableMapping):
+    """
+    Bitmaps of an index file, each decoded on first access. Bitmaps added
+    or changed later only live in memory until the index is saved again.
+
+    attr:
+        - data (memoryview): the mapped index file.
+        - table (dict): offset and length of every stored bitmap.
+        - decoded (dict): bitmaps decoded or added so far.
+    """
+
+    def __init__(self, data, table):
+        self.data = data
+        self.table = table
+        self.decoded = {}
+
+    def __getitem__(self, key):
+        bitmap = self.decoded.get(key)
+        if bitmap is None:
+            offset, length = self.table[key]
+            bitmap = Bitmap.from_bytes(self.data[offset : offset + length])
+            self.decoded[key] = bitmap
+        return bitmap
+
+    def __setitem__(self, key, bitmap):
+        self.decoded[key] = bitmap
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.table = {k: v for k, v in self.table.items() if k != key}
+        self.decoded.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self.decoded or key in self.table
+
+    def __iter__(self):
+        yield from self.table
+        for key in self.decoded:
+            if key not in self.table:
+                yield key
+
+    def __len__(self):
+        return len(self.table) + sum(1 for k in self.decoded if k not in self.table)
+
+
+class TagIndex:
+    """
+    TagIndex is an inverted index of the stored questions. Each question
+    gets an ordinal in the order it was added; every tag maps to a Bitmap of
+    the ordinals of its questions and views, votes and answers are kept as
+    columns indexed by ordinal, plus a Bitmap per value bucket of each
+    column. Co-occurrence, per tag totals and thresholds on the columns are
+    answered by bitmap intersections instead of rebuilding a Graph, and
+    related tags by counting the tag ids of the selected questions.
+
+    The index file is memory mapped by load: columns become views of the
+    file and bitmaps are decoded when a query first touches them, so a
+    query only reads what it needs however large the index is.
+
+    attr:
+        - tags (Dict[str, Bitmap]): questions per tag.
+        - names (list(str)): tag per tag id, in the order tags were seen.
+        - name_ids (Dict[str, int]): tag id per tag.
+        - views (array): views per ordinal.
+        - votes (array): votes per ordinal.
+        - answers (array): answers per ordinal.
+        - question_tags (array): tag ids of every question, one after
+            the other.
+        - question_offsets (array): where the tag ids of each ordinal
+            start in question_tags, plus the end.
+        - buckets (Dict[str, Dict[int, Bitmap]]): questions per value
+            bucket of each column, see BOUNDS.
+        - last_id: largest mongodb _id indexed, used to update the index
+            incrementally.
+        - recent_ids (set): ids indexed within the update window.
+        - masks (dict): cached unions of the buckets above a threshold.
+    """
+
+    def __init__(self):
+        self.tags = {}
+        self.names = []
+        self.name_ids = {}
+        self.views = array("q")
+        self.votes = array("q")
+        self.answers = array("q")
+        self.question_tags = array("I")
+        self.question_offsets = array("Q", [0])
+        self.buckets = {name: {} for name in COLUMNS}
+        self.last_id = None
+        self.recent_ids = set()
+        # union of the buckets from a bucket on, per (column, bucket).
+        self.masks = {}
+
+    def __len__(self):
+        return len(self.views)
+
+    def add(self, doc):
+        """
+        Index a single document.
+
+        params:
+            - doc (dict): mongodb document with numbers of views,
+                answers, votes and list of tags.
+        """
+
+        if self.masks:
+            self.masks.clear()
+        if not isinstance(self.views, array):
+            self.copy_columns()
+
+        ordinal = len(self.views)
+        self.views.append(doc["views"])
+        self.votes.append(doc["votes"])
+        self.answers.append(doc["answers"])
+
+        for tag in set(doc["tags"]):
+            if tag not in self.tags:
+                self.tags[tag] = Bitmap()
+                self.name_ids[tag] = len(self.names)
+                self.names.append(tag)
+            self.tags[tag].add(ordinal)
+            self.question_tags.append(self.name_ids[tag])
+        self.question_offsets.append(len(self.question_tags))
+
+        for name in COLUMNS:
+            buckets = self.buckets[name]
+            b = bucket(doc[name])
+            if b not in buckets:
+                buckets[b] = Bitmap()
+            buckets[b].add(ordinal)
+
+        if "_id" in doc:
+            self.recent_ids.add(doc["_id"])
+            if self.last_id is None or doc["_id"] > self.last_id:
+                self.last_id = doc["_id"]
+
+    def copy_columns(self):
+        """
+        Replace the columns mapped from the index file by arrays that can
+        grow.
+        """
+
+        for name in COLUMNS + FORWARD:
+            view = getattr(self, name)
+            column = array(view.format)
+            column.frombytes(view.cast("B"))
+            setattr(self, name, column)
+
+    def update(self, collection, window=600):
+        """
+        Index the documents added to collection since the last update.
+
+        ObjectIds are generated by the crawler's writer threads before the
+        insert commits, so a document can show up after one with a larger
+        _id was indexed. Documents less than window seconds older than the
+        newest indexed one are therefore scanned again, skipping the ones
+        in recent_ids.
+
+        params:
+            - collection (mongo collection): the scraped questions.
+            - window (int): seconds scanned again before last_id.
+
+        returns:
+            - int: number of new documents.
+        """
+
+        query = {}
+        if self.last_id is not None:
+            query = {"_id": {"$gte": self.window_start(window)}}
+
+        count = 0
+        for doc in collection.find(query).sort("_id", 1):
+            if doc["_id"] in self.recent_ids:
+                continue
+            self.add(doc)
+            count += 1
+            if count % 100000 == 0:
+                self.forget_ids(window)
+
+        if self.last_id is not None:
+            self.forget_ids(window)
+        return count
+
+    def window_start(self, window):
+        return ObjectId.from_datetime(
+            self.last_id.generation_time - timedelta(seconds=window)
+        )
+
+    def forget_ids(self, window):
+        """
+        Drop the ids that are older than the next update will scan again.
+        """
+
+        start = self.window_start(window)
+        self.recent_ids = {i for i in self.recent_ids if i >= start}
+
+    def at_least(self, name, minimum, within=None):
+        """
+        Questions whose column name is at least minimum: the union of the
+        buckets above minimum and the matching questions of the bucket
+        minimum falls into, which is the only one checked value by value.
+
+        params:
+            - name (str): one of views, votes or answers.
+            - minimum (int): smallest value kept.
+            - within (Bitmap): if given, only these questions of the
+                partial bucket are checked.
+
+        returns:
+            - Bitmap
+        """
+
+        column = getattr(self, name)
+        first = bucket(minimum)
+        # buckets from full on only hold values >= minimum.
+        full = first if BOUNDS[first] == minimum else first + 1
+
+        if (name, full) not in self.masks:
+            self.masks[name, full] = Bitmap.union(
+                bitmap for b, bitmap in self.buckets[name].items() if b >= full
+            )
+        result = self.masks[name, full]
+
+        partial = self.buckets[name].get(first) if full > first else None
+        if partial is not None:
+            if within is not None:
+                partial = partial & within
+            matches = Bitmap(i for i in partial if column[i] >= minimum)
+            result = result | matches
+
+        return result
+
+    def select(self, tag=None, min_views=None, min_votes=None, min_answers=None):
+        """
+        Questions of tag (or all questions) passing the given filters.
+
+        returns:
+            - Bitmap: ordinals of the matching questions.
+        """
+
+        ordinals = None if tag is None else self.tags.get(tag, Bitmap())
+        for name, minimum in zip(COLUMNS, (min_views, min_votes, min_answers)):
+            if minimum is None:
+                continue
+            matches = self.at_least(name, minimum, within=ordinals)
+            ordinals = matches if ordinals is None else ordinals & matches
+
+        if ordinals is None:
+            ordinals = Bitmap.full(len(self))
+        return ordinals
+
+    def pair_count(self, tag1, tag2, **filters):
+        """
+        Number of (filtered) questions using both tags.
+        """
+
+        return self.select(tag1, **filters).intersection_len(
+            self.tags.get(tag2, Bitmap())
+        )
+
+    def stats(self, tag, **filters):
+        """
+        Totals of the (filtered) questions of tag, as in graph.Node.
+
+        returns:
+            - dict: views, answers, votes and weight.
+        """
+
+        ordinals = list(self.select(tag, **filters))
+        return {
+            "views": sum(self.views[i] for i in ordinals),
+            "answers": sum(self.answers[i] for i in ordinals),
+            "votes": sum(self.votes[i] for i in ordinals),
+            "weight": len(ordinals),
+        }
+
+    def related(self, tag, n=10, **filters):
+        """
+        Tags most often used together with tag. The tag ids of the
+        selected questions are counted, which only touches those questions
+        instead of the bitmap of every tag.
+
+        returns:
+            - list(tuple(str, int)): up to n tags and their pair counts,
+                ties in the order the tags were first seen.
+        """
+
+        tags, offsets = self.question_tags, self.question_offsets
+        counts = Counter(
+            chain.from_iterable(
+                tags[offsets[i] : offsets[i + 1]] for i in self.select(tag, **filters)
+            )
+        )
+        counts.pop(self.name_ids.get(tag), None)
+        top = heapq.nsmallest(n, counts.items(), key=lambda c: (-c[1], c[0]))
+        return [(self.names[i], count) for i, count in top]
+
+    def save(self, path):
+        """
+        Write the index to path: a header pointing to a pickled table of
+        contents, and the raw columns and serialized bitmaps it indexes,
+        each aligned to 8 bytes. The file is replaced atomically.
+        """
+
+        columns = {name: getattr(self, name) for name in COLUMNS + FORWARD}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(bytes(HEADER.size))
+
+            def write(data):
+                offset = f.tell()
+                length = memoryview(data).nbytes
+                f.write(data)
+                f.write(bytes(-length % 8))
+                return offset, length
+
+            contents = {
+                "byteorder": sys.byteorder,
+                "last_id": self.last_id,
+                "recent_ids": self.recent_ids,
+                "names": self.names,
+                "columns": {
+                    name: write(column) + (memoryview(column).format,)
+                    for name, column in columns.items()
+                },
+                "tags": {tag: write(self.tags[tag].to_bytes()) for tag in self.names},
+                "buckets": {
+                    name: {b: write(bitmap.to_bytes()) for b, bitmap in buckets.items()}
+                    for name, buckets in self.buckets.items()
+                },
+            }
+            offset, length = write(
+                pickle.dumps(contents, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, offset, length))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory map an index written by save. Only the table of contents is
+        read here, everything else when a query needs it.
+        """
+
+        with open(path, "rb") as f:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        magic, offset, length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(
+                "{} is not a tag index in the current format, delete it and "
+                "run --update to rebuild it".format(path)
+            )
+        contents = pickle.loads(data[offset : offset + length])
+        if contents["byteorder"] != sys.byteorder:
+            raise ValueError("{} was written on another byte order".format(path))
+
+        index = cls.__new__(cls)
+        index.last_id = contents["last_id"]
+        index.recent_ids = contents["recent_ids"]
+        index.names = contents["names"]
+        index.name_ids = {tag: i for i, tag in enumerate(index.names)}
+        for name, (offset, length, typecode) in contents["columns"].items():
+            setattr(index, name, data[offset : offset + length].cast(typecode))
+        index.tags = LazyBitmaps(data, contents["tags"])
+        index.buckets = {
+            name: LazyBitmaps(data, table)
+            for name, table in contents["buckets"].items()
+        }
+        index.masks = {}
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query tags through an index.")
+    parser.add_argument("--index", default=os.getenv("TAG_INDEX") or "tags.idx")
+    parser.add_argument(
+        "--update", action="store_true", help="index new questions from mongodb"
+    )
+    parser.add_argument("--related", metavar="TAG")
+    parser.add_argument("--pair", nargs=2, metavar="TAG")
+    parser.add_argument("--stats", metavar="TAG")
+    parser.add_argument("-n", type=int, default=10)
+    parser.add_argument("--min-views", type=int)
+    parser.add_argument("--min-votes", type=int)
+    parser.add_argument("--min-answers", type=int)
+    args = parser.parse_args()
+
+    index = TagIndex.load(args.index) if os.path.exists(args.index) else TagIndex()
+
+    if args.update:
+        # only needed when talking to mongodb, queries work offline.
+        from pymongo import MongoClient
+
+        client = MongoClient(os.getenv("MONGO_URI") or "mongodb://mongo_app:27017/")
+        added = index.update(client["stackoverflowdataset"].stackoverflowdataset)
+        index.save(args.index)
+        print("indexed {} new questions, {} in total".format(added, len(index)))
+
+    filters = dict(
+        min_views=args.min_views,
+        min_votes=args.min_votes,
+        min_answers=args.min_answers,
+    )
+    if args.related:
+        for tag, count in index.related(args.related, args.n, **filters):
+            print("{:<30} {}".format(tag, count))
+    if args.pair:
+        print(index.pair_count(*args.pair, **filters))
+    if args.stats:
+        print(index.stats(args.stats, **filters))
+
+
+if __name__ == "__main__":
+    main()
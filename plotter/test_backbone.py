@@ -0,0 +1,51 @@
+import unittest
+from backbone import *
+from graph import Graph
+
+
+class TestBackbone(unittest.TestCase):
+    def setUp(self):
+        # "python" is mostly used with "django", the remaining edges are
+        # weak and evenly spread.
+        self.edges = {
+            ("django", "python"): 100,
+            ("c", "python"): 2,
+            ("java", "python"): 2,
+            ("go", "python"): 2,
+            ("c", "java"): 3,
+            ("go", "java"): 1,
+        }
+
+    def test_min_weight(self):
+        edges = min_weight_edges(self.edges, 3)
+        self.assertEqual(set(edges), {("django", "python"), ("c", "java")})
+
+    def test_disparity(self):
+        edges = disparity_edges(self.edges, 0.05)
+        self.assertIn(("django", "python"), edges)
+        self.assertNotIn(("go", "python"), edges)
+        self.assertNotIn(("c", "python"), edges)
+
+    def test_disparity_keeps_everything_at_alpha_one(self):
+        self.assertEqual(disparity_edges(self.edges, 1.01), self.edges)
+
+    def test_top_k(self):
+        edges = top_k_edges(self.edges, 1)
+        self.assertEqual(
+            set(edges), {("django", "python"), ("c", "java"), ("go", "python")}
+        )
+        self.assertEqual(edges[("c", "java")], 3)
+
+    def test_edge_filter(self):
+        g = Graph()
+        g.edges.update(self.edges)
+        g.nodes["python"]
+        EdgeFilter(min_weight=3, top_k=1).apply(g)
+        self.assertEqual(set(g.edges), {("django", "python"), ("c", "java")})
+        self.assertIn("python", g.nodes)
+
+    def test_empty_edge_filter(self):
+        g = Graph()
+        g.edges.update(self.edges)
+        EdgeFilter().apply(g)
+        self.assertEqual(g.edges, self.edges)
@@ -0,0 +1,29 @@
+import unittest
+from corpus import *
+
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(
+            list(generate(200, vocabulary=100, seed=3)),
+            list(generate(200, vocabulary=100, seed=3)),
+        )
+        self.assertNotEqual(
+            list(generate(200, vocabulary=100, seed=3)),
+            list(generate(200, vocabulary=100, seed=4)),
+        )
+
+    def test_documents(self):
+        for doc in generate(500, vocabulary=100):
+            self.assertTrue(1 <= len(doc["tags"]) <= 5)
+            self.assertEqual(len(set(doc["tags"])), len(doc["tags"]))
+            self.assertGreaterEqual(doc["views"], 10)
+            self.assertGreaterEqual(doc["answers"], 1)
+
+    def test_zipf_skew(self):
+        counts = {}
+        for doc in generate(2000, vocabulary=100):
+            for tag in doc["tags"]:
+                counts[tag] = counts.get(tag, 0) + 1
+
+        self.assertGreater(counts["tag0"], counts.get("tag50", 0))
@@ -27,10 +27,18 @@ class TestGraph(unittest.TestCase):
         self.assertEqual(n.answers, 15)
         self.assertEqual(n.weight, 3)
 
-    # def test_empty_graph(self):
-    #     g1 = Graph()
-    #     self.assertEqual(g1.nodes, defaultdict(Node))
-    #     self.assertEqual(g1.edges, defaultdict(int))
+    def test_empty_graph(self):
+        g1 = Graph()
+        self.assertEqual(g1.nodes, defaultdict(Node))
+        self.assertEqual(g1.edges, defaultdict(int))
+
+    def test_graphs_do_not_share_state(self):
+        g1 = Graph()
+        g1.add_document(
+            {"tags": ["python", "c"], "views": 1, "votes": 1, "answers": 1})
+        g2 = Graph()
+        self.assertEqual(len(g2.nodes), 0)
+        self.assertEqual(len(g2.edges), 0)
 
     def test_graph_node(self):
         g = Graph()
@@ -0,0 +1,89 @@
+import unittest
+import math
+import multiprocessing
+import os
+import time
+from unittest import mock
+import layout
+from layout import *
+
+
+def pid_layout(N, edges):
+    # stands in for a slow layout and records the worker it ran in.
+    time.sleep(0.2)
+    return [[float(os.getpid()), 0.0, 0.0]] * N
+
+
+class TestLayout(unittest.TestCase):
+    def setUp(self):
+        # a triangle, a pair and two isolated nodes.
+        self.N = 7
+        self.edges = [(0, 1), (1, 2), (2, 0), (3, 4)]
+
+    def test_components(self):
+        groups = components(self.N, self.edges)
+        self.assertEqual([sorted(g) for g in groups[:2]], [[0, 1, 2], [3, 4]])
+        self.assertEqual(sorted(groups[2:]), [[5], [6]])
+
+    def test_components_without_edges(self):
+        self.assertEqual(components(3, []), [[0], [1], [2]])
+
+    def test_pack_cells_do_not_overlap(self):
+        layouts = [
+            [[0.0, 0.0, 0.0], [4.0, 0.0, 1.0], [0.0, 4.0, -1.0]],
+            [[10.0, 10.0, 0.0], [12.0, 10.0, 0.0]],
+            [[0.0, 0.0, 0.0]],
+            [[5.0, 5.0, 5.0]],
+        ]
+        packed = pack(layouts, gap=1.0)
+        self.assertEqual([len(c) for c in packed], [len(c) for c in layouts])
+
+        # every component fits in a circle of its radius around its center,
+        # two such circles must stay apart.
+        discs = []
+        for coords in packed:
+            cx = sum(c[0] for c in coords) / len(coords)
+            cy = sum(c[1] for c in coords) / len(coords)
+            r = max(math.hypot(c[0] - cx, c[1] - cy) for c in coords)
+            discs.append((cx, cy, r))
+        for i, (x1, y1, r1) in enumerate(discs):
+            for x2, y2, r2 in discs[i + 1 :]:
+                self.assertGreaterEqual(math.hypot(x1 - x2, y1 - y2), r1 + r2)
+
+    def test_pack_keeps_shape(self):
+        coords = [[0.0, 0.0, 0.0], [3.0, 4.0, 2.0]]
+        (packed,) = pack([coords])
+        self.assertAlmostEqual(packed[1][0] - packed[0][0], 3.0)
+        self.assertAlmostEqual(packed[1][1] - packed[0][1], 4.0)
+        self.assertAlmostEqual(packed[1][2] - packed[0][2], 2.0)
+
+    def test_component_layout(self):
+        layt = component_layout(self.N, self.edges, workers=2, min_nodes=0)
+        self.assertEqual(len(layt), self.N)
+        self.assertTrue(all(len(xyz) == 3 for xyz in layt))
+
+    def test_batches(self):
+        jobs = [(500, []), (100, []), (40, []), (30, []), (10, []), (2, [])]
+        self.assertEqual(
+            [[n for n, _ in task] for task in batches(jobs)],
+            [[500], [100], [40, 30], [10, 2]],
+        )
+
+    def test_large_components_use_several_workers(self):
+        if multiprocessing.get_start_method() != "fork":
+            self.skipTest("workers only see the patched layout when forked")
+
+        # four chains of 100 nodes.
+        edges = [(i, i + 1) for i in range(400) if (i + 1) % 100]
+        with mock.patch.object(layout, "layout_graph", pid_layout), \
+                mock.patch.object(layout, "pack", lambda layouts: layouts):
+            layt = component_layout(400, edges, workers=4, min_nodes=0)
+        self.assertGreater(len({xyz[0] for xyz in layt}), 1)
+
+    def test_component_layout_below_min_nodes(self):
+        layt = component_layout(self.N, self.edges, workers=2, min_nodes=100)
+        self.assertEqual(len(layt), self.N)
+
+
+if __name__ == "__main__":
+    unittest.main()
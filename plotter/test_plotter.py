@@ -0,0 +1,77 @@
+import os
+import unittest
+from types import SimpleNamespace
+from backbone import EdgeFilter
+from graph import Graph
+from main import env_flag
+from plotter import Plotter
+
+
+class TestPlotter(unittest.TestCase):
+    def setUp(self):
+        g = Graph()
+        docs = [
+            (["python", "django"], 5),
+            (["python", "pandas"], 3),
+            (["java", "python"], 1),
+            (["java"], 1),
+        ]
+        for tags, times in docs:
+            for _ in range(times):
+                g.add_document(
+                    {"tags": tags, "views": 10, "votes": 2, "answers": 1})
+
+        # the stages only need raw_graph, so skip the mongo connection.
+        self.plotter = Plotter.__new__(Plotter)
+        self.plotter.raw_graph = self.plotter.trim_raw_graph(g, 10)
+
+    def layout(self):
+        nodes, edges, nodes_labels, edges_labels = self.plotter.c_style_arrays()
+        sizes = [10] * len(nodes)
+        colors = ["rgb(0, 70, 0)"] * len(nodes)
+        data, _ = self.plotter.gen_data_layout(
+            len(nodes), edges, sizes, nodes_labels, edges_labels, colors
+        )
+        return nodes, data
+
+    def test_trailing_isolated_node(self):
+        # "java" is the lightest tag, so it has the last index, and the
+        # filter removes its only edge.
+        EdgeFilter(min_weight=2).apply(self.plotter.raw_graph)
+        nodes, data = self.layout()
+        self.assertEqual(nodes[-1], "java")
+        self.assertEqual(len(data[1].x), len(nodes))
+
+    def test_no_edges_left(self):
+        EdgeFilter(min_weight=100).apply(self.plotter.raw_graph)
+        nodes, data = self.layout()
+        self.assertEqual(len(data[1].x), len(nodes))
+
+    def materialized_db(self, counted, stored):
+        meta = {"_id": "questions", "count": counted} if counted else None
+        return SimpleNamespace(
+            tag_stats_meta=SimpleNamespace(find_one=lambda query: meta),
+            stackoverflowdataset=SimpleNamespace(
+                estimated_document_count=lambda: stored
+            ),
+        )
+
+    def test_check_materialized(self):
+        self.plotter.db = self.materialized_db(99500, 100000)
+        self.plotter.check_materialized()
+
+        self.plotter.db = self.materialized_db(50000, 100000)
+        self.assertRaises(RuntimeError, self.plotter.check_materialized)
+
+        self.plotter.db = self.materialized_db(None, 100000)
+        self.assertRaises(RuntimeError, self.plotter.check_materialized)
+
+
+class TestEnvFlag(unittest.TestCase):
+    def test_env_flag(self):
+        for value, expected in [("1", True), ("true", True), ("0", False),
+                                ("no", False), ("", False)]:
+            os.environ["SODS_TEST_FLAG"] = value
+            self.assertEqual(env_flag("SODS_TEST_FLAG"), expected)
+        del os.environ["SODS_TEST_FLAG"]
+        self.assertFalse(env_flag("SODS_TEST_FLAG"))
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import profiling
+from profiling import Profiler
+
+
+def slow_items(n, delay):
+    for i in range(n):
+        time.sleep(delay)
+        yield i
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled(self):
+        p = Profiler(enabled=False)
+        p.start()
+        with p.stage("stage"):
+            items = list(p.iterate("read", range(3)))
+        p.stop()
+        self.assertEqual(items, [0, 1, 2])
+        self.assertEqual(p.stages, {})
+
+    def test_record_accumulates(self):
+        p = Profiler()
+        p.record("stage", 1.0, 0.5, 100)
+        p.record("stage", 2.0, 0.25, 50)
+        p.record("stage", 1.0, 0.25, None)
+        self.assertEqual(
+            p.stages["stage"],
+            {"seconds": 4.0, "cpu_seconds": 1.0, "peak_bytes": 100},
+        )
+
+    def test_iterate_excluded_from_stage(self):
+        p = Profiler(trace_memory=False)
+        p.start()
+        with p.stage("build"):
+            for _ in p.iterate("read", slow_items(3, 0.05)):
+                time.sleep(0.01)
+        p.stop()
+
+        self.assertGreaterEqual(p.stages["read"]["seconds"], 0.15)
+        self.assertLess(p.stages["build"]["seconds"], 0.1)
+        self.assertIsNone(p.stages["build"]["peak_bytes"])
+
+    def test_nested_stage_time_excluded(self):
+        p = Profiler(trace_memory=False)
+        with p.stage("outer"):
+            with p.stage("inner"):
+                time.sleep(0.1)
+        self.assertGreaterEqual(p.stages["inner"]["seconds"], 0.1)
+        self.assertLess(p.stages["outer"]["seconds"], 0.05)
+
+    def test_peak_relative_to_stage_start(self):
+        p = Profiler()
+        p.start()
+        kept = bytearray(4 * 2 ** 20)
+        with p.stage("small"):
+            b = bytearray(2 ** 20)
+            del b
+        p.stop()
+        del kept
+
+        peak = p.stages["small"]["peak_bytes"]
+        self.assertGreaterEqual(peak, 2 ** 20)
+        self.assertLess(peak, 2 * 2 ** 20)
+
+    def test_nested_stage_keeps_outer_peak(self):
+        p = Profiler()
+        p.start()
+        with p.stage("outer"):
+            b = bytearray(4 * 2 ** 20)
+            del b
+            with p.stage("inner"):
+                pass
+        p.stop()
+
+        self.assertGreaterEqual(p.stages["outer"]["peak_bytes"], 4 * 2 ** 20)
+        self.assertLess(p.stages["inner"]["peak_bytes"], 2 ** 20)
+
+    def test_reset_peak_fallback(self):
+        # python 3.8 has no tracemalloc.reset_peak.
+        with mock.patch.object(profiling, "HAS_RESET_PEAK", False):
+            self.test_peak_relative_to_stage_start()
+            self.test_nested_stage_keeps_outer_peak()
+
+    def test_pstats_and_summary(self):
+        path = os.path.join(tempfile.mkdtemp(), "run.pstats")
+        p = Profiler(pstats_path=path)
+        p.start()
+        with p.stage("layout"):
+            sum(range(1000))
+        p.stop()
+
+        self.assertTrue(os.path.exists(path))
+        summary = p.summary().splitlines()
+        self.assertEqual(summary[1].split()[0], "layout")
+        self.assertEqual(summary[-1].split()[0], "total")
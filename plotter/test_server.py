@@ -0,0 +1,55 @@
+import json
+import threading
+import unittest
+from graph import Graph
+from http.server import ThreadingHTTPServer
+from server import *
+from slices import GraphSlices
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+
+class TestSliceHandler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        g = Graph()
+        for tags in (["python", "django"], ["python", "pandas"], ["java"]):
+            g.add_document({"tags": tags, "views": 1, "votes": 1, "answers": 1})
+        layt = [[i, i, i] for i in range(len(g.nodes))]
+
+        cls.httpd = ThreadingHTTPServer(("127.0.0.1", 0), SliceHandler)
+        cls.httpd.slices = GraphSlices(g, layt, max_nodes=2, max_edges=1)
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+        cls.url = "http://127.0.0.1:{}".format(cls.httpd.server_port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def get(self, path):
+        with urlopen(self.url + path) as response:
+            return response.read()
+
+    def test_slices_are_capped(self):
+        self.assertEqual(len(json.loads(self.get("/slice/top?n=100"))["nodes"]), 2)
+        self.assertEqual(len(json.loads(self.get("/slice/cutoff"))["edges"]), 1)
+
+    def test_negative_rejected(self):
+        for path in ("/slice/top?n=-1", "/slice/cutoff?limit=-5"):
+            with self.assertRaises(HTTPError) as error:
+                self.get(path)
+            self.assertEqual(error.exception.code, 400)
+
+    def test_plotlyjs_served(self):
+        self.assertEqual(self.get("/plotly.min.js"), plotlyjs())
+        self.assertIn(b'src="/plotly.min.js"', self.get("/"))
+
+
+class TestCount(unittest.TestCase):
+    def test_count(self):
+        self.assertEqual(count({"n": "3"}, "n", 1), 3)
+        self.assertEqual(count({}, "n", 1), 1)
+        self.assertIsNone(count({}, "limit"))
+        self.assertRaises(ValueError, count, {"n": "-1"}, "n")
+        self.assertRaises(ValueError, count, {"n": "x"}, "n")
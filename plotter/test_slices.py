@@ -0,0 +1,111 @@
+import json
+import unittest
+from graph import Graph
+from slices import *
+
+
+class TestGraphSlices(unittest.TestCase):
+    def setUp(self):
+        g = Graph()
+        docs = [
+            (["python", "django"], 3),
+            (["python", "pandas"], 2),
+            (["python", "java"], 1),
+            (["java", "spring"], 2),
+            (["c"], 1),
+        ]
+        for tags, times in docs:
+            for _ in range(times):
+                g.add_document(
+                    {"tags": tags, "views": 1, "votes": 1, "answers": 1})
+
+        layt = [[i, i, i] for i in range(len(g.nodes))]
+        self.slices = GraphSlices(g, layt, cache_bytes=4096)
+        self.small = GraphSlices(g, layt, max_nodes=3, max_edges=2)
+
+    def tags(self, data):
+        return {node["tag"] for node in data["nodes"]}
+
+    def test_ranks(self):
+        self.assertEqual(self.slices.tags[0], "python")
+        self.assertEqual(self.slices.nodes[0]["weight"], 6)
+
+    def test_top(self):
+        data = self.slices.top(3)
+        self.assertEqual(self.tags(data), {"python", "java", "django"})
+        self.assertEqual(len(data["edges"]), 2)
+        self.assertEqual(len(self.slices.top(100)["nodes"]), 6)
+
+    def test_cutoff(self):
+        data = self.slices.cutoff(2)
+        self.assertEqual(
+            self.tags(data), {"python", "django", "pandas", "java", "spring"}
+        )
+        self.assertEqual(len(data["edges"]), 3)
+        self.assertEqual(len(self.slices.cutoff(2, 1)["edges"]), 1)
+
+    def test_neighborhood(self):
+        self.assertEqual(
+            self.tags(self.slices.neighborhood("java")),
+            {"java", "python", "spring"},
+        )
+        self.assertEqual(
+            self.tags(self.slices.neighborhood("java", 2, 1)),
+            {"java", "spring"},
+        )
+        self.assertEqual(len(self.slices.neighborhood("java", 2)["nodes"]), 5)
+        self.assertEqual(self.slices.neighborhood("rust"),
+                         {"nodes": [], "edges": []})
+
+    def test_render_cached(self):
+        body = self.slices.render("top", 2)
+        self.assertIs(body, self.slices.render("top", 2))
+        self.assertEqual(len(json.loads(body)["nodes"]), 2)
+
+    def test_limits(self):
+        self.assertEqual(len(self.small.top(100)["nodes"]), 3)
+        self.assertEqual(len(self.small.top(100)["edges"]), 2)
+        self.assertEqual(len(self.small.cutoff(1)["edges"]), 2)
+        self.assertEqual(len(self.small.cutoff(1, 100)["edges"]), 2)
+        self.assertEqual(len(self.small.cutoff(1, 1)["edges"]), 1)
+
+        edges = self.small.neighborhood("python", 2)["edges"]
+        self.assertEqual([weight for _, _, weight in edges], [3, 2])
+
+    def test_node_limits(self):
+        self.small.max_edges = 100
+        for data in [
+            self.small.top(100),
+            self.small.cutoff(1),
+            self.small.neighborhood("python", 5),
+            self.small.neighborhood("java", 5, 1),
+        ]:
+            self.assertLessEqual(len(data["nodes"]), 3)
+            ids = {node["id"] for node in data["nodes"]}
+            self.assertTrue(all(n1 in ids and n2 in ids
+                                for n1, n2, _ in data["edges"]))
+
+        data = self.small.cutoff(1)
+        self.assertEqual(self.tags(data), {"python", "django", "pandas"})
+        self.assertEqual(len(data["edges"]), 2)
+        self.assertEqual(
+            self.tags(self.small.neighborhood("spring", 5)),
+            {"spring", "java", "python"},
+        )
+
+
+class TestSliceCache(unittest.TestCase):
+    def test_bounded_by_bytes(self):
+        cache = SliceCache(10)
+        cache.get("a", lambda: b"aaaa")
+        cache.get("b", lambda: b"bbbb")
+        cache.get("a", lambda: b"")
+        cache.get("c", lambda: b"cccc")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+
+    def test_too_large(self):
+        cache = SliceCache(10)
+        self.assertEqual(cache.get("a", lambda: b"a" * 11), b"a" * 11)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
@@ -0,0 +1,227 @@
+import datetime
+import os
+import random
+import tempfile
+import unittest
+from bson import ObjectId
+from tagindex import *
+
+
+class FakeCollection:
+    """
+    The part of a mongo collection TagIndex.update uses. Only the
+    documents in visible are returned, like uncommitted inserts.
+    """
+
+    def __init__(self):
+        self.visible = []
+
+    def find(self, query):
+        start = query.get("_id", {}).get("$gte")
+        self.found = [d for d in self.visible if start is None or d["_id"] >= start]
+        return self
+
+    def sort(self, key, direction):
+        return sorted(self.found, key=lambda d: d[key])
+
+
+class TestBitmap(unittest.TestCase):
+    def test_add_contains(self):
+        b = Bitmap([5, 1, 70000, 5])
+        self.assertEqual(len(b), 3)
+        self.assertEqual(list(b), [1, 5, 70000])
+        self.assertIn(70000, b)
+        self.assertNotIn(2, b)
+
+    def test_dense_container(self):
+        values = range(0, 20000, 2)
+        b = Bitmap(values)
+        self.assertIsInstance(b.containers[0], int)
+        self.assertEqual(list(b), list(values))
+        self.assertEqual(len(b), len(values))
+
+    def test_intersection(self):
+        sparse = Bitmap([3, 6, 9, 70000, 70003])
+        dense = Bitmap(range(0, 30000, 3))
+        other = Bitmap(range(0, 30000, 2))
+        self.assertEqual(list(sparse & dense), [3, 6, 9])
+        self.assertEqual(list(dense & sparse), [3, 6, 9])
+        self.assertEqual(list(dense & other), list(range(0, 30000, 6)))
+        self.assertEqual(list(sparse & Bitmap([6, 70003])), [6, 70003])
+
+        for b1, b2 in [(sparse, dense), (dense, other), (sparse, other)]:
+            self.assertEqual(b1.intersection_len(b2), len(b1 & b2))
+            self.assertEqual(list(b1.intersection_lens([b2, b1])),
+                             [len(b1 & b2), len(b1)])
+
+    def test_union(self):
+        sparse = Bitmap([1, 70000])
+        dense = Bitmap(range(0, 20000, 2))
+        union = sparse | dense
+        self.assertEqual(list(union), sorted(set(sparse) | set(dense)))
+
+        # the union must not share mutable containers with its inputs.
+        union.add(70001)
+        self.assertNotIn(70001, sparse)
+
+    def test_full(self):
+        for n in [0, 3, 5000, 65536, 70000]:
+            self.assertEqual(list(Bitmap.full(n)), list(range(n)))
+
+    def test_bytes(self):
+        b = Bitmap(list(range(0, 20000, 2)) + [70000, 200000])
+        copy = Bitmap.from_bytes(b.to_bytes())
+        self.assertIsInstance(copy.containers[0], int)
+        self.assertEqual(list(copy), list(b))
+        self.assertEqual(list(Bitmap.from_bytes(Bitmap().to_bytes())), [])
+
+
+class TestTagIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = TagIndex()
+        docs = [
+            {"tags": ["python", "django"], "views": 100, "votes": 5, "answers": 2},
+            {"tags": ["python", "pandas"], "views": 10, "votes": 1, "answers": 1},
+            {"tags": ["python", "django"], "views": 5, "votes": -1, "answers": 0},
+            {"tags": ["java"], "views": 50, "votes": 2, "answers": 3},
+        ]
+        for i, doc in enumerate(docs):
+            doc["_id"] = i
+            self.index.add(doc)
+
+    def test_pair_count(self):
+        self.assertEqual(self.index.pair_count("python", "django"), 2)
+        self.assertEqual(self.index.pair_count("python", "java"), 0)
+        self.assertEqual(
+            self.index.pair_count("python", "django", min_views=10), 1)
+
+    def test_stats(self):
+        self.assertEqual(
+            self.index.stats("python"),
+            {"views": 115, "answers": 3, "votes": 5, "weight": 3},
+        )
+        self.assertEqual(self.index.stats("python", min_votes=1)["weight"], 2)
+
+    def test_related(self):
+        self.assertEqual(
+            self.index.related("python"), [("django", 2), ("pandas", 1)])
+        self.assertEqual(
+            self.index.related("python", min_views=10),
+            [("django", 1), ("pandas", 1)],
+        )
+
+    def test_thresholds_match_brute_force(self):
+        rng = random.Random(1)
+        index = TagIndex()
+        for i in range(3000):
+            index.add({
+                "tags": [rng.choice(["a", "b", "c"])],
+                "views": int(rng.paretovariate(1.0)),
+                "votes": rng.randint(-20, 200),
+                "answers": rng.randint(0, 9),
+            })
+
+        for tag in [None, "a"]:
+            for filters in [
+                {"min_views": 3},
+                {"min_views": 4},
+                {"min_views": 7},
+                {"min_views": 1000},
+                {"min_votes": -5},
+                {"min_votes": -7},
+                {"min_votes": 0, "min_answers": 5},
+                {"min_views": 10 ** 12},
+            ]:
+                expected = [
+                    i for i in range(len(index))
+                    if (tag is None or i in index.tags[tag])
+                    and index.views[i] >= filters.get("min_views", -10 ** 18)
+                    and index.votes[i] >= filters.get("min_votes", -10 ** 18)
+                    and index.answers[i] >= filters.get("min_answers", -10 ** 18)
+                ]
+                self.assertEqual(list(index.select(tag, **filters)), expected)
+
+        self.assertEqual(list(index.select()), list(range(len(index))))
+
+        # cached masks are dropped once new questions arrive.
+        index.add({"tags": ["a"], "views": 10 ** 12, "votes": 0, "answers": 0})
+        self.assertEqual(list(index.select(min_views=10 ** 12)), [3000])
+
+    def test_update_out_of_order(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        ids = [ObjectId.from_datetime(now + datetime.timedelta(seconds=s))
+               for s in range(3)]
+        docs = [{"_id": i, "tags": ["python"], "views": 1, "votes": 0,
+                 "answers": 0} for i in ids]
+
+        collection = FakeCollection()
+        index = TagIndex()
+
+        # the second insert commits after the third one.
+        collection.visible = [docs[0], docs[2]]
+        self.assertEqual(index.update(collection), 2)
+        collection.visible = docs
+        self.assertEqual(index.update(collection), 1)
+        self.assertEqual(index.update(collection), 0)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.last_id, ids[2])
+
+    def test_incremental_save_load(self):
+        self.assertEqual(self.index.last_id, 3)
+        path = os.path.join(tempfile.mkdtemp(), "tags.idx")
+        self.index.save(path)
+
+        index = TagIndex.load(path)
+        index.add({"_id": 4, "tags": ["python", "django"],
+                   "views": 1, "votes": 0, "answers": 0})
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.last_id, 4)
+        self.assertEqual(index.pair_count("python", "django"), 3)
+
+        # saving over the mapped file keeps every question.
+        index.save(path)
+        index = TagIndex.load(path)
+        self.assertEqual(len(index), 5)
+        self.assertEqual(index.related("django"), [("python", 3)])
+
+    def test_load_is_lazy(self):
+        path = os.path.join(tempfile.mkdtemp(), "tags.idx")
+        self.index.save(path)
+        index = TagIndex.load(path)
+        self.assertEqual(index.tags.decoded, {})
+        self.assertEqual(list(index.tags), index.names)
+        self.assertEqual(set(index.tags), set(self.index.tags))
+
+        self.assertEqual(index.stats("python", min_votes=1)["weight"], 2)
+        self.assertEqual(set(index.tags.decoded), {"python"})
+        self.assertEqual(
+            index.related("python", min_views=10), self.index.related(
+                "python", min_views=10))
+        self.assertEqual(list(index.views), list(self.index.views))
+
+    def test_load_other_format(self):
+        path = os.path.join(tempfile.mkdtemp(), "tags.idx")
+        with open(path, "wb") as f:
+            f.write(bytes(64))
+        self.assertRaises(ValueError, TagIndex.load, path)
+
+    def test_related_matches_bitmaps(self):
+        rng = random.Random(2)
+        index = TagIndex()
+        for i in range(2000):
+            index.add({
+                "tags": rng.sample("abcdefgh", rng.randint(1, 4)),
+                "views": rng.randint(0, 100),
+                "votes": 0,
+                "answers": 0,
+            })
+        for tag in "abc":
+            base = index.select(tag, min_views=50)
+            expected = {
+                other: base.intersection_len(index.tags[other])
+                for other in index.tags if other != tag
+            }
+            self.assertEqual(
+                dict(index.related(tag, n=10, min_views=50)),
+                {t: c for t, c in expected.items() if c},
+            )